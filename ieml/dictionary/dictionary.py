@@ -3,6 +3,8 @@ from collections import defaultdict
 from ieml.commons import cached_property
 from ieml.dictionary.relations import RelationsGraph
 from ieml.dictionary.table import Cell, table_class
+from ieml.dictionary.tables_index import TablesIndex
+from ieml.dictionary.headers import TablesHeaders
 from ieml.dictionary.version import save_dictionary_to_cache, load_dictionary_from_cache
 from ieml.exceptions import TermNotFoundInDictionary, ScriptNotDefinedInVersion
 from .version import DictionaryVersion, get_default_dictionary_version
@@ -13,6 +15,7 @@ from ieml import get_configuration
 import gc
 
 USE_CACHE = get_configuration().get("RELATIONS", "cacherelations")
+HEADERS_WORKERS = get_configuration().getint("DICTIONARY", "headersworkers")
 logger = logging.getLogger(__name__)
 
 
@@ -36,17 +39,23 @@ class DictionarySingleton(type):
             if cls._instance is None or cls._instance.version != version:
 
                 if cls._instance is not None:
+                    # the cached parsed trees reference the terms of the unloaded dictionary
+                    from ieml.syntax.parser.parser import IEMLParser
+                    IEMLParser.cache.invalidate(str(cls._instance.version))
+
                     del cls._instance
                     gc.collect()
 
                 # check cache
-                if not version.is_cached or not USE_CACHE:
+                cls._instance = None
+                if version.is_cached and USE_CACHE:
+                    cls._instance = load_dictionary_from_cache(version)
+
+                if cls._instance is None:
                     cls._instance = super(DictionarySingleton, cls).__call__(version, **kwargs)
 
                     if USE_CACHE:
                         save_dictionary_to_cache(cls._instance)
-                else:
-                    cls._instance = load_dictionary_from_cache(version)
 
         return cls._instance
 
@@ -67,6 +76,8 @@ class Dictionary(metaclass=DictionarySingleton):
         self.inhibitions = None
         self.index = None
         self.relations_graph = None
+        self.tables_index = None
+        self.tables_headers = None
 
         self._populate()
         logger.log(logging.INFO, "Dictionary loaded (version: %s, nb_roots: %d, nb_terms: %d)"%
@@ -97,7 +108,7 @@ class Dictionary(metaclass=DictionarySingleton):
         paradigms = sorted(paradigms, key=len, reverse=True)
 
         self.terms[root] = table_class(root)(root, index=script_index[root], dictionary=self, parent=None)
-        defined = {self.terms[root]}
+        defined = {self.terms[root].index: self.terms[root]}
 
         for ss in root.singular_sequences:
             self.terms[ss] = Cell(script=ss, index=script_index[ss], dictionary=self, parent=self.terms[root])
@@ -106,9 +117,12 @@ class Dictionary(metaclass=DictionarySingleton):
             if s in self.terms:
                 continue
 
-            candidates = set()
-            for t in defined:
+            # only the tables that include all the singular sequences of s can be its parent, test the smaller first
+            tables = sorted((defined[i] for i in self.tables_index.containing(script_index[s], list(defined))),
+                            key=len)
 
+            candidates = set()
+            for t in tables:
                 accept, regular = t.accept_script(s)
                 if accept:
                     candidates |= {(t, regular)}
@@ -127,11 +141,11 @@ class Dictionary(metaclass=DictionarySingleton):
                                            dictionary=self,
                                            parent=parent,
                                            regular=regular)
-            defined.add(self.terms[s])
+            defined[self.terms[s].index] = self.terms[s]
 
-        self.roots[self.terms[root]] = sorted(defined | set(self.terms[root]))
+        self.roots[self.terms[root]] = sorted(set(defined.values()) | set(self.terms[root]))
 
-    def _populate(self, scripts=None, relations=None):
+    def _populate(self, scripts=None, relations=None, tables_index=None, tables_headers=None):
         self.version.load()
 
         if scripts is None:
@@ -142,18 +156,23 @@ class Dictionary(metaclass=DictionarySingleton):
         script_index = {
             s: i for i, s in enumerate(self.scripts)
         }
-        roots = defaultdict(list)
-        root_ss = {}
-        for root in self.version.roots:
-            root = script(root)
-            for ss in root.singular_sequences:
-                root_ss[ss] = root
 
-        for s in self.scripts:
+        if tables_index is None:
+            self.tables_index = TablesIndex(self.scripts, [script(r) for r in self.version.roots])
+        else:
+            self.tables_index = tables_index
+
+        if tables_headers is None:
+            self.tables_headers = TablesHeaders(self.scripts, workers=HEADERS_WORKERS)
+        else:
+            self.tables_headers = tables_headers
+
+        roots = defaultdict(list)
+        for i, s in enumerate(self.scripts):
             if s.cardinal == 1:
                 continue
 
-            roots[root_ss[s.singular_sequences[0]]].append(s)
+            roots[self.scripts[self.tables_index.root[i]]].append(s)
 
         self.terms = {}
         self.roots = {}
@@ -166,13 +185,15 @@ class Dictionary(metaclass=DictionarySingleton):
         if relations is None:
             self.relations_graph = RelationsGraph(dictionary=self)
         else:
-            assert all(rel.shape[0] == len(self) and rel.shape[1] == len(self) for rel in relations)
+            assert relations.forward.shape == (len(self), len(self))
             self.relations_graph = relations
 
     def __getstate__(self):
         return {
             'relations': self.relations_graph,
             'scripts': self.scripts,
+            'tables_index': self.tables_index,
+            'tables_headers': self.tables_headers,
             'version': str(self.version)
         }
 
@@ -181,7 +202,18 @@ class Dictionary(metaclass=DictionarySingleton):
             self.version = state['version']
         else:
             self.version = DictionaryVersion(state['version'])
-        self._populate(scripts=state['scripts'], relations=state['relations'])
+        self._populate(scripts=state['scripts'], relations=state['relations'], tables_index=state['tables_index'],
+                       tables_headers=state['tables_headers'])
+
+    def tables_layout(self, term):
+        """
+        The precomputed layout of all the tables of a paradigm (for instance a root paradigm), as int32 arrays of
+        terms index (-1 for a header that is not a term of this dictionary).
+        :param term: a paradigm term of this dictionary
+        :return: a list, one entry per table, of dict {'cells': (rows, columns, tabs), 'rows': (tabs, rows),
+        'columns': (tabs, columns), 'tabs': (tabs,)}
+        """
+        return self.tables_headers.layout(self.terms[script(term)].index)
 
     def translate_script_from_version(self, version, old_script):
         diff = self.version.diff_for_version(version)
@@ -1,15 +1,16 @@
 import logging
 import os
-import pickle
+import tempfile
 from enum import Enum, unique, IntEnum
 from itertools import combinations, product, groupby, chain
 
 import bidict
 import numpy as np
+from scipy.sparse import triu
 from scipy.sparse.csr import csr_matrix
 
 from ieml.dictionary.dictionary import Dictionary
-from ieml.dictionary.tools import term
+from ieml.dictionary.relations import ETYMOLOGY_FATHERS
 
 logger = logging.getLogger(__name__)
 
@@ -30,14 +31,110 @@ RelationType = unique(IntEnum('RelationType', {
 }))
 
 
+# the distance between two terms that are not related
+NULL_DISTANCE = 255
+
+
 def default_metric(dictionary_version):
+    """
+    The distance between the terms: the maximum of the order values between the two terms (0 for the same term),
+    NULL_DISTANCE if they are not related.
+    :return: a function of two terms, two terms index or two arrays of terms index (pairwise), that returns the
+    distance or an uint8 array of the distances
+    """
     mat = get_matrix('distance', dictionary_version)
-    return lambda t0, t1: mat[t0.index, t1.index]
+    size = mat.shape[0]
+    keys = np.repeat(np.arange(size, dtype=np.int64), np.diff(mat.indptr)) * size + mat.indices
+
+    def _index(t):
+        return t.index if hasattr(t, 'index') else np.asarray(t, dtype=np.int64)
+
+    def metric(t0, t1):
+        query = _index(t0) * size + _index(t1)
+        pos = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        result = np.where(keys[pos] == query, mat.data[pos], NULL_DISTANCE).astype(np.uint8)
+        return int(result) if result.ndim == 0 else result
+
+    return metric
+
+
+class OrderRanking:
+    """
+    The rows of the order matrix sorted by order value (the ties in the order of the stored entries): the ranking of
+    the term i is ranked[indptr[i]:indptr[i + 1]], the ranking restricted to the singular sequences is
+    ss_ranked[ss_indptr[i]:ss_indptr[i + 1]].
+    """
+    def __init__(self, order, singular):
+        """
+        :param order: the order csr matrix
+        :param singular: a boolean array, True for the singular sequences
+        """
+        order = csr_matrix(order)
+        rows = np.repeat(np.arange(order.shape[0]), np.diff(order.indptr))
+        position = np.lexsort((np.arange(order.nnz), order.data, rows))
+
+        self.indptr = order.indptr.astype(np.int64)
+        self.ranked = order.indices[position].astype(np.int32)
+
+        ss = singular[self.ranked]
+        self.ss_indptr = np.zeros(len(self.indptr), dtype=np.int64)
+        self.ss_indptr[1:] = np.cumsum(np.bincount(rows[ss], minlength=order.shape[0]))
+        self.ss_ranked = self.ranked[ss]
+
+    def ranking(self, index, singular_only=False):
+        indptr, ranked = (self.ss_indptr, self.ss_ranked) if singular_only else (self.indptr, self.ranked)
+        return ranked[indptr[index]:indptr[index + 1]]
+
+    def top_k(self, indices, k, singular_only=False):
+        """The k first terms of the rankings of the terms `indices`, an int32 array (len(indices), k) padded with
+        -1."""
+        indptr, ranked = (self.ss_indptr, self.ss_ranked) if singular_only else (self.indptr, self.ranked)
+        indices = np.asarray(indices, dtype=np.int64)
+
+        positions = indptr[indices][:, None] + np.arange(k)
+        valid = positions < indptr[indices + 1][:, None]
+        return np.where(valid, ranked[np.where(valid, positions, 0)] if len(ranked) else -1, -1).astype(np.int32)
+
+
+_RANKINGS = {}
+
+
+def get_ranking(version):
+    key = str(version)
+    if key not in _RANKINGS:
+        d = Dictionary(version)
+        singular = np.array([len(t) == 1 for t in d.index], dtype=bool)
+        _RANKINGS[key] = OrderRanking(get_matrix('order', version), singular)
+
+    return _RANKINGS[key]
+
+
+def top_k(term_or_indices, k, singular_only=False, version=None):
+    """
+    The k closest terms (the first terms of the order matrix row) of a term or of an array of terms index.
+    :param singular_only: rank only the singular sequences
+    :param version: the dictionary version of the terms index (default the version of the term or the default one)
+    :return: an int32 array of the terms index for a term or a term index, an int32 array (len(indices), k) padded
+    with -1 for an array of terms index.
+    """
+    from .terms import Term
+
+    if isinstance(term_or_indices, Term):
+        version = term_or_indices.dictionary.version if version is None else version
+        term_or_indices = term_or_indices.index
+    elif version is None:
+        version = Dictionary().version
+
+    ranking = get_ranking(version)
+    if np.ndim(term_or_indices) == 0:
+        return ranking.ranking(int(term_or_indices), singular_only=singular_only)[:k]
+
+    return ranking.top_k(term_or_indices, k, singular_only=singular_only)
 
 
 def term_ranking(t):
-    order = get_matrix('order', t.dictionary.version)
-    terms = [term(int(i)) for i in sorted(order[t.index, :].indices, key=lambda o: order[t.index, o])]
+    ranked = get_ranking(t.dictionary.version).ranking(t.index)
+    terms = [t.dictionary.index[i] for i in ranked]
     return [t for t in terms if len(t) == 1], [t for t in terms if len(t) != 1]
 
 
@@ -72,20 +169,56 @@ def test_metric(t0):
 
 
 
+_MATRICES = {}
+
+
+def _matrix_files(name, version):
+    return {part: '/tmp/cache_%s_%s_%s.npy' % (name, str(version), part) for part in ('data', 'indices', 'indptr')}
+
+
+def _save_matrix(name, version, mat):
+    files = _matrix_files(name, version)
+    mat.sort_indices()
+    # indptr last, its file marks a complete matrix
+    for part in ('data', 'indices', 'indptr'):
+        _save_array(files[part], getattr(mat, part))
+
+
+def _save_array(file, array):
+    """Write the array to a temporary file of the same directory then rename it, the file is never rewritten in place
+    (the other processes may have it memory-mapped)."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(file), suffix='.npy.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            np.save(fp, array)
+        os.replace(tmp, file)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _load_matrix(name, version):
+    """Load the uint8 csr matrix with its arrays memory-mapped from the cache files."""
+    files = _matrix_files(name, version)
+    data, indices, indptr = (np.load(files[part], mmap_mode='r') for part in ('data', 'indices', 'indptr'))
+    return csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(indptr) - 1), copy=False)
+
+
 def get_matrix(name, version):
-    file = '/tmp/cache_%s_%s.npy' % (name, str(version))
-    if os.path.isfile(file):
-        with open(file, 'rb') as fp:
-            return pickle.load(fp)
+    key = (name, str(version))
+    if key in _MATRICES:
+        return _MATRICES[key]
+
+    if os.path.isfile(_matrix_files(name, version)['indptr']):
+        _MATRICES[key] = _load_matrix(name, version)
     else:
         logger.log(logging.INFO, "Building distance matrix '%s'."%name)
         mat = MATRIX_BUILD[name](version)
         for k, v in mat.items():
-            file_name = '/tmp/cache_%s_%s.npy' % (k, str(version))
-            with open(file_name, 'wb') as fp:
-                pickle.dump(v, fp)
+            _save_matrix(k, version, v)
+            _MATRICES[(k, str(version))] = v
 
-        return mat[name]
+    return _MATRICES[key]
 
 
 def get_relation(t0, t1, prefix=None):
@@ -135,6 +268,13 @@ for i, rellist in RELATION_ORDER_FROM_MAX_RANK.items():
     RELATION_ORDER_FROM_MAX_RANK[i] = {rel: j for j, rel in enumerate(res)}
 
 
+# the order values as a table indexed by [max_rank, relation type], -1 if undefined
+RELATION_ORDER_TABLE = np.full((6, max(RelationType) + 1), -1, dtype=np.int64)
+for i, values in RELATION_ORDER_FROM_MAX_RANK.items():
+    for rel, j in values.items():
+        RELATION_ORDER_TABLE[i, int(rel)] = j
+
+
 def get_relation_value(relation, t0):
     return RELATION_ORDER_FROM_MAX_RANK[t0.max_rank][relation]
 
@@ -152,92 +292,153 @@ RELATIONS_TYPES = [
     ('table_0', RelationType.Rank_0)
 ]
 
-def _build_distance_matrix(version):
-    def _enumerate_ancestors(t, prefix='', seen=None):
-        if seen is None:
-            seen = set()
-        for k, v in t.relations.father.items():
-            for t1 in v:
-                # if t1 is layer 0, we include this etymology only if it is a direct father/child
-                if t1.layer == 0 and len(prefix) != 0:
-                    continue
-
-                if t1 not in seen:
-                    yield (prefix + k, t1)
-                    seen.add(t1)
-
-                if len(prefix) < 2:
-                    yield from _enumerate_ancestors(t1, prefix=prefix + k, seen=seen)
-
-    d = Dictionary(version)
-
-    def _put(mat,d, i, j):
-        mat[0].extend(d)
-        mat[1].extend(i)
-        mat[2].extend(j)
-
-    order_matrix = ([], [], [])
-    relation_type_matrix = ([], [], [])
-
-    all_indices = {
-        rel : [set(l) for l in np.split(d.relations_graph[rel].indices, d.relations_graph[rel].indptr)[1:-1]]
-        for rel, _ in RELATIONS_TYPES
-    }
+def _etymology(d):
+    """
+    The ancestors of each term through at most 3 father relations (the layer 0 ancestors only as direct fathers), with
+    the path prefix of the first path in the depth first order of the father relations (s, a, m, then terms index).
+    The paths are expanded from the father relations arrays one depth at a time.
+    :return: three arrays: the terms index, the ancestors index and the prefixes
+    """
+    graph = d.relations_graph
+    size = len(d)
+    layer0 = np.array([t.layer == 0 for t in d.index], dtype=bool)
+
+    # the father relations edges, grouped by term
+    edges = [graph[ETYMOLOGY_FATHERS[k]].tocoo() for k in 'sam']
+    src = np.concatenate([e.row for e in edges]).astype(np.int64)
+    dst = np.concatenate([e.col for e in edges]).astype(np.int64)
+    kind = np.concatenate([np.full(e.nnz, i, dtype=np.int64) for i, e in enumerate(edges)])
+    order = np.lexsort((dst, kind, src))
+    src, dst, kind = src[order], dst[order], kind[order]
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(src, minlength=size))
+
+    # a path is identified by its key (k1, n1, k2, n2, k3): the relations kinds (1 to 3) and the intermediate terms
+    # (index + 1), 0 if missing. The depth first order is the order of the keys.
+    radix = size + 1
+
+    terms = np.arange(size, dtype=np.int64)
+    ends = np.arange(size, dtype=np.int64)
+    prefixes = np.zeros(size, dtype=np.int64)
+    acc = np.zeros(size, dtype=np.int64)
+
+    result = []
+    for depth in range(3):
+        counts = indptr[ends + 1] - indptr[ends]
+        path = np.repeat(np.arange(len(ends)), counts)
+        edge = np.repeat(indptr[ends], counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        if depth != 0:
+            # if the ancestor is layer 0, we include this etymology only if it is a direct father/child
+            keep = ~layer0[dst[edge]]
+            path, edge = path[keep], edge[keep]
+
+        terms, prefixes, acc = terms[path], prefixes[path] * 3 + kind[edge], acc[path]
+        ends, k = dst[edge], kind[edge] + 1
+
+        if depth == 0:
+            acc = k * radix + ends + 1
+            keys = acc * 4 * radix * 4
+        elif depth == 1:
+            acc = (acc * 4 + k) * radix + ends + 1
+            keys = acc * 4
+        else:
+            keys = acc * 4 + k
 
-    for root in d.roots:
-        past = set()
-        for t0 in root.relations.contains:
-            past.add(t0.index)
-            seen = set(past)
+        result.append((terms, ends, np.full(len(terms), depth), prefixes, keys))
 
-            for rel_graph, rel_type in RELATIONS_TYPES:
-                indices = all_indices[rel_graph][t0.index].difference(seen)
-                if indices:
-                    value = get_relation_value(rel_type, t0)
+    terms, ancestors, depths, prefixes, keys = (np.concatenate(r) for r in zip(*result))
 
-                    _put(order_matrix, [value] * len(indices), [t0.index] * len(indices), indices)
-                    _put(order_matrix, [value] * len(indices), indices, [t0.index] * len(indices))
+    # keep the first path for each (term, ancestor)
+    order = np.lexsort((keys, ancestors, terms))
+    terms, ancestors, depths, prefixes = terms[order], ancestors[order], depths[order], prefixes[order]
+    first = np.ones(len(terms), dtype=bool)
+    first[1:] = (terms[1:] != terms[:-1]) | (ancestors[1:] != ancestors[:-1])
 
-                    _put(relation_type_matrix, [int(rel_type)] * len(indices), [t0.index] * len(indices), indices)
-                    _put(relation_type_matrix, [int(rel_type)] * len(indices), indices, [t0.index] * len(indices))
+    names = [''.join('sam'[p // 3 ** (dp - i) % 3] for i in range(dp + 1))
+             for p, dp in zip(prefixes[first], depths[first])]
+    return terms[first], ancestors[first], names
 
-                    seen.update(indices)
 
-    for layer in d.layers:
-        for t0 in layer:
-            for prefix, t1 in _enumerate_ancestors(t0):
-                rel = get_relation(t0, t1, prefix=prefix)
-                order = get_relation_value(rel, t0)
+def _relation_values(d, terms, relations):
+    """The order values (RELATION_ORDER_FROM_MAX_RANK) of the relations types `relations` from the terms `terms`."""
+    unique, inverse = np.unique(terms, return_inverse=True)
+    max_rank = np.array([d.index[i].max_rank for i in unique], dtype=np.int64)[inverse]
 
-                _put(relation_type_matrix, [int(rel)], [t0.index], [t1.index])
-                _put(order_matrix, [order], [t0.index], [t1.index])
+    values = RELATION_ORDER_TABLE[max_rank, relations]
+    if np.any(values == -1):
+        i = np.flatnonzero(values == -1)[0]
+        raise KeyError(RelationType(int(relations[i])))
 
-                rel = get_relation(t1, t0, prefix=prefix)
-                order = get_relation_value(rel, t1)
+    return values
 
-                _put(relation_type_matrix, [int(rel)], [t1.index], [t0.index])
-                _put(order_matrix, [order], [t1.index], [t0.index])
 
-    indices = list(range(len(d)))
-    _put(relation_type_matrix, [int(RelationType.Equal)] * len(d), indices, indices)
-    _put(order_matrix, [0] * len(d) , indices, indices)
+def _build_distance_matrix(version):
+    d = Dictionary(version)
+    size = len(d)
+    graph = d.relations_graph
+
+    # root relations: for each pair of terms (t0 < t1), the first relation type of RELATIONS_TYPES, the order value
+    # is given by the max rank of t0
+    pairs = []
+    for precedence, (rel_graph, rel_type) in enumerate(RELATIONS_TYPES):
+        matrix = triu(graph[rel_graph], k=1, format='coo')
+        pairs.append((matrix.row.astype(np.int64), matrix.col.astype(np.int64),
+                      np.full(matrix.nnz, precedence, dtype=np.int64)))
+
+    rows, columns, precedence = (np.concatenate(a) for a in zip(*pairs))
+    order = np.lexsort((precedence, columns, rows))
+    rows, columns, precedence = rows[order], columns[order], precedence[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])
+    rows, columns, precedence = rows[first], columns[first], precedence[first]
+
+    relations = np.array([int(rel_type) for _, rel_type in RELATIONS_TYPES], dtype=np.int64)[precedence]
+    values = _relation_values(d, rows, relations)
+
+    relation_type_matrix = [(relations, rows, columns), (relations, columns, rows)]
+    order_matrix = [(values, rows, columns), (values, columns, rows)]
+
+    # etymology: the father relations from the term to its ancestor, the child relations in the other way
+    terms, ancestors, prefixes = _etymology(d)
+    if len(terms):
+        layers = np.array([t.layer for t in d.index], dtype=np.int64)
+        father = np.array([int(RelationType['Father_%s' % p]) for p in prefixes], dtype=np.int64)
+        child = np.array([int(RelationType['Child_%s' % p]) for p in prefixes], dtype=np.int64)
+
+        for t0, t1 in ((terms, ancestors), (ancestors, terms)):
+            relations = np.where(layers[t0] < layers[t1], child, father)
+            relation_type_matrix.append((relations, t0, t1))
+            order_matrix.append((_relation_values(d, t0, relations), t0, t1))
+
+    indices = np.arange(size, dtype=np.int64)
+    relation_type_matrix.append((np.full(size, int(RelationType.Equal), dtype=np.int64), indices, indices))
+    order_matrix.append((np.zeros(size, dtype=np.int64), indices, indices))
 
     def build_mat(mat):
-        assert len(set(zip(mat[1], mat[2]))) == len(list(zip(mat[1], mat[2])))
-        return csr_matrix((mat[0], (mat[1], mat[2])), dtype=int)
+        data, i, j = (np.concatenate(a) for a in zip(*mat))
+        assert len(np.unique(i * size + j)) == len(i)
+        assert data.max(initial=0) < NULL_DISTANCE
+        return csr_matrix((data.astype(np.uint8), (i, j)), shape=(size, size), dtype=np.uint8)
 
-    # distance_matrix = build_mat(distance_matrix)
-    # order_matrix = build_mat(order_matrix)
     relation_type_matrix = build_mat(relation_type_matrix)
     order_matrix = build_mat(order_matrix)
-    # 'distance': distance_matrix,
-    # 'order': order_matrix,
+
+    # the distance is the max of the order values in both ways, the relations are always put in both ways
+    coo = order_matrix.tocoo()
+    keys = coo.row.astype(np.int64) * size + coo.col
+    sort = np.argsort(keys)
+    reverse = sort[np.searchsorted(keys[sort], coo.col.astype(np.int64) * size + coo.row)]
+    distance_matrix = csr_matrix((np.maximum(coo.data, coo.data[reverse]), (coo.row, coo.col)), shape=(size, size),
+                                 dtype=np.uint8)
+
     return {'relation': relation_type_matrix,
-            'order': order_matrix}
+            'order': order_matrix,
+            'distance': distance_matrix}
 
 
 MATRIX_BUILD = {
-    # 'distance': _build_distance_matrix,
+    'distance': _build_distance_matrix,
     'order': _build_distance_matrix,
     'relation': _build_distance_matrix,
     # 'ancestor': _build_ancestor_matrix
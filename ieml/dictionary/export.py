@@ -0,0 +1,125 @@
+"""
+Streaming export of the terms and the relations of a dictionary to csv or ndjson files.
+
+The terms metadata are gathered once per dictionary version in arrays, the relations are read from the adjacency
+matrix of the relations graph by chunks of terms, so the memory used doesn't depend on the size of the dictionary.
+"""
+import csv
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ..constants import GRAMMATICAL_CLASS_NAMES, LANGUAGES
+from .relations import RELATIONS
+
+NODE_FIELDS = ['id', 'IEML', 'INDEX', 'CLASS', 'LAYER', 'SIZE', 'PARADIGM', 'ROOT', 'RANK'] + \
+              [l.upper() for l in sorted(LANGUAGES)]
+EDGE_FIELDS = ['src', 'dst', 'relation']
+
+FORMATS = {'csv', 'ndjson'}
+
+
+def stable_id(s):
+    """A 63 bits id of the string `s`, stable across the dictionary versions (the terms index are not)."""
+    return int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), 'big') >> 1
+
+
+# the terms ids of the last dictionary versions, keyed by version so the unloaded dictionaries are not kept alive
+_TERMS_IDS = OrderedDict()
+_TERMS_IDS_SIZE = 4
+_terms_ids_lock = threading.Lock()
+
+
+def terms_ids(dictionary):
+    """The stable ids of the terms of the dictionary, an int64 array indexed by terms index."""
+    version = str(dictionary.version)
+    with _terms_ids_lock:
+        if version in _TERMS_IDS:
+            _TERMS_IDS.move_to_end(version)
+            return _TERMS_IDS[version]
+
+    ids = np.array([stable_id(str(t.script)) for t in dictionary.index], dtype=np.int64)
+    with _terms_ids_lock:
+        _TERMS_IDS[version] = ids
+        while len(_TERMS_IDS) > _TERMS_IDS_SIZE:
+            _TERMS_IDS.popitem(last=False)
+
+    return ids
+
+
+def iter_nodes(dictionary):
+    """Yield a dict of the metadata (NODE_FIELDS) of each term of the dictionary."""
+    ids = terms_ids(dictionary)
+    for t in dictionary.index:
+        node = {
+            'id': int(ids[t.index]),
+            'IEML': str(t.script),
+            'INDEX': t.index,
+            'CLASS': GRAMMATICAL_CLASS_NAMES[t.grammatical_class],
+            'LAYER': t.script.layer,
+            'SIZE': t.script.cardinal,
+            'PARADIGM': t.script.paradigm,
+            'ROOT': int(ids[t.root.index]),
+            'RANK': t.rank
+        }
+        for l in LANGUAGES:
+            node[l.upper()] = t.translations[l]
+
+        yield node
+
+
+def iter_edges(dictionary, types=None, chunksize=1000):
+    """
+    Yield the relations of the dictionary as (src id, dst id, relation type) tuples, one per relation type.
+    :param types: the relation types to export (default all)
+    :param chunksize: the number of terms whose relations are read at once
+    """
+    ids = terms_ids(dictionary)
+    graph = dictionary.relations_graph
+    types = RELATIONS if types is None else types
+    bits = [(RELATIONS.index(r), r) for r in types]
+
+    for start in range(0, len(dictionary), chunksize):
+        indices = np.arange(start, min(start + chunksize, len(dictionary)))
+        rows, columns, masks = graph.neighbours_of(indices, types=types, coo=True)
+
+        src, dst = ids[indices[rows]], ids[columns]
+        for i in range(len(masks)):
+            for bit, reltype in bits:
+                if masks[i] >> bit & 1:
+                    yield int(src[i]), int(dst[i]), reltype
+
+
+def _write(path, fields, rows, format):
+    with open(path, 'w', newline='') as fp:
+        if format == 'csv':
+            writer = csv.writer(fp)
+            writer.writerow(fields)
+            for r in rows:
+                writer.writerow([r[f] for f in fields] if isinstance(r, dict) else r)
+        else:
+            for r in rows:
+                fp.write(json.dumps(r if isinstance(r, dict) else dict(zip(fields, r)), ensure_ascii=False) + '\n')
+
+
+def export(dictionary, directory, format='csv', types=None, chunksize=1000):
+    """
+    Write the terms (nodes.csv or nodes.ndjson) and the relations (edges.csv or edges.ndjson) of the dictionary in
+    the directory.
+    :return: the paths of the nodes and the edges files
+    """
+    if format not in FORMATS:
+        raise ValueError("Invalid export format %s, expected one of {%s}" % (format, ', '.join(sorted(FORMATS))))
+
+    os.makedirs(directory, exist_ok=True)
+    nodes = os.path.join(directory, 'nodes.%s' % format)
+    edges = os.path.join(directory, 'edges.%s' % format)
+
+    _write(nodes, NODE_FIELDS, iter_nodes(dictionary), format)
+    _write(edges, EDGE_FIELDS, iter_edges(dictionary, types=types, chunksize=chunksize), format)
+
+    return nodes, edges
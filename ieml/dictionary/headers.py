@@ -0,0 +1,141 @@
+import logging
+from multiprocessing import Pool
+
+import numpy as np
+
+from .script import factorize
+
+logger = logging.getLogger(__name__)
+
+
+def _script_headers(s):
+    """
+    Compute the headers of all the tables of the paradigm `s`.
+    :return: a list, one entry per table of s: (rows, columns, tabs), each a list of header scripts. rows and
+    columns have one list per tab.
+    """
+    ss = s.singular_sequences
+    result = []
+    offset = 0
+    for cells in s.cells:
+        rows = [[factorize([ss[i] for i in line]) for line in cells[:, :, k]] for k in range(cells.shape[2])]
+        columns = [[factorize([ss[i] for i in line]) for line in cells[:, :, k].transpose()]
+                   for k in range(cells.shape[2])]
+
+        # one table script per tab
+        tabs = s.tables_script[offset:offset + cells.shape[2]]
+        offset += cells.shape[2]
+
+        result.append((rows, columns, tabs))
+
+    return result
+
+
+def _scripts_headers(scripts):
+    return [_script_headers(s) for s in scripts]
+
+
+class TablesHeaders:
+    """
+    Precomputed layout of the tables of every paradigm of a dictionary: the cells (terms index) and the headers
+    (rows and columns of each tab, and the tabs) as header scripts and terms index (-1 if the header is not a term of
+    the dictionary).
+
+    All the int32 arrays are flat, a paradigm is a range of tables (tables_indptr), each table has a shape
+    (rows, columns, tabs) and an offset in each flat array.
+    """
+    def __init__(self, scripts, workers=1):
+        """
+        :param scripts: the sorted list of the scripts of the dictionary (the position is the term index)
+        :param workers: the number of processes to use for the headers factorisation
+        """
+        script_index = {s: i for i, s in enumerate(scripts)}
+        self.size = len(scripts)
+
+        logger.log(logging.DEBUG, "Computing tables headers")
+
+        paradigms = [s for s in scripts if s.cardinal != 1]
+        if workers > 1 and paradigms:
+            chunks = [paradigms[i::workers] for i in range(workers)]
+            with Pool(workers) as pool:
+                results = pool.map(_scripts_headers, chunks)
+
+            headers = {}
+            for chunk, result in zip(chunks, results):
+                headers.update(zip(chunk, result))
+            headers = [headers[s] for s in paradigms]
+        else:
+            headers = _scripts_headers(paradigms)
+
+        self.rows_scripts, self.columns_scripts, self.tabs_scripts = [], [], []
+        cells, shapes = [], []
+        count = np.zeros(self.size, dtype=np.int64)
+
+        for s, tables in zip(paradigms, headers):
+            ss_index = np.array([script_index[ss] for ss in s.singular_sequences], dtype=np.int32)
+            count[script_index[s]] = len(tables)
+
+            for c, (rows, columns, tabs) in zip(s.cells, tables):
+                cells.append(ss_index[c].ravel())
+                shapes.append(c.shape)
+                self.rows_scripts.extend(h for tab in rows for h in tab)
+                self.columns_scripts.extend(h for tab in columns for h in tab)
+                self.tabs_scripts.extend(tabs)
+
+        self.tables_indptr = np.zeros(self.size + 1, dtype=np.int64)
+        self.tables_indptr[1:] = np.cumsum(count)
+
+        # rows, columns, tabs
+        self.shapes = np.array(shapes, dtype=np.int32).reshape((-1, 3))
+        self.cells = np.concatenate(cells).astype(np.int32) if cells else np.zeros(0, dtype=np.int32)
+
+        def _offsets(sizes):
+            offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(sizes)
+            return offsets
+
+        self.cells_offset = _offsets(np.prod(self.shapes, axis=1))
+        self.rows_offset = _offsets(self.shapes[:, 0] * self.shapes[:, 2])
+        self.columns_offset = _offsets(self.shapes[:, 1] * self.shapes[:, 2])
+        self.tabs_offset = _offsets(self.shapes[:, 2])
+
+        def _terms_index(headers):
+            return np.array([script_index.get(h, -1) for h in headers], dtype=np.int32)
+
+        self.rows = _terms_index(self.rows_scripts)
+        self.columns = _terms_index(self.columns_scripts)
+        self.tabs = _terms_index(self.tabs_scripts)
+
+    def _tables(self, paradigm):
+        return range(self.tables_indptr[paradigm], self.tables_indptr[paradigm + 1])
+
+    def layout(self, paradigm):
+        """
+        The layout of the tables of the paradigm `paradigm` (term index).
+        :return: a list, one entry per table, of dict with the int32 arrays of terms index:
+            - cells: (rows, columns, tabs)
+            - rows: (tabs, rows) the rows headers of each tab
+            - columns: (tabs, columns) the columns headers of each tab
+            - tabs: (tabs,) the tabs headers
+        """
+        result = []
+        for i in self._tables(paradigm):
+            rows, columns, tabs = self.shapes[i]
+            result.append({
+                'cells': self.cells[self.cells_offset[i]:self.cells_offset[i + 1]].reshape((rows, columns, tabs)),
+                'rows': self.rows[self.rows_offset[i]:self.rows_offset[i + 1]].reshape((tabs, rows)),
+                'columns': self.columns[self.columns_offset[i]:self.columns_offset[i + 1]].reshape((tabs, columns)),
+                'tabs': self.tabs[self.tabs_offset[i]:self.tabs_offset[i + 1]]
+            })
+
+        return result
+
+    def script_rows(self, paradigm, table=0, tab=0):
+        i = self.tables_indptr[paradigm] + table
+        start = self.rows_offset[i] + tab * self.shapes[i][0]
+        return self.rows_scripts[start:start + self.shapes[i][0]]
+
+    def script_columns(self, paradigm, table=0, tab=0):
+        i = self.tables_indptr[paradigm] + table
+        start = self.columns_offset[i] + tab * self.shapes[i][1]
+        return self.columns_scripts[start:start + self.shapes[i][1]]
@@ -6,10 +6,16 @@ import numpy as np
 from scipy.sparse.coo import coo_matrix
 from scipy.sparse.csr import csr_matrix
 from scipy.sparse.dok import dok_matrix
+from scipy.sparse import triu
+from scipy.sparse.csgraph import connected_components
 
+from ieml import get_configuration
 from ieml.commons import cached_property
 from ieml.dictionary.script.script import MultiplicativeScript, AdditiveScript, NullScript
 
+LAZY_RELATIONS = get_configuration().getboolean("RELATIONS", "lazyrelations")
+PERSIST_LAZY_RELATIONS = get_configuration().getboolean("RELATIONS", "persistlazyrelations")
+
 logger = logging.getLogger(__name__)
 RELATIONS = [
             'contains',         # 0
@@ -67,20 +73,95 @@ INVERSE_RELATIONS = {
 }
 
 
+def relations_mask(types=None):
+    """The uint32 bitmask of the relation types `types` (names or RELATIONS positions, default all), the bit i is
+    the relation RELATIONS[i]."""
+    if types is None:
+        types = RELATIONS
+
+    mask = 0
+    for reltype in types:
+        mask |= 1 << (reltype if isinstance(reltype, int) else RELATIONS.index(reltype))
+
+    return np.uint32(mask)
+
+
+def relation_types(mask):
+    """The relation types names of the bitmask `mask`."""
+    return [reltype for i, reltype in enumerate(RELATIONS) if int(mask) >> i & 1]
+
+
+# the forward relations, their inverse is the next relation type in RELATIONS (bit << 1)
+FORWARD_RELATIONS = ['contains', 'father_substance', 'father_attribute', 'father_mode']
+SYMMETRIC_RELATIONS = ['opposed', 'associated', 'crossed', 'twin']
+TABLE_RELATIONS = ['table_%d'%i for i in range(6)]
+
+_FORWARD_MASK = relations_mask(FORWARD_RELATIONS)
+_SYMMETRIC_MASK = relations_mask(SYMMETRIC_RELATIONS)
+_TABLE_BIT = RELATIONS.index('table_0')
+
+ETYMOLOGY_FATHERS = {'s': 'father_substance', 'a': 'father_attribute', 'm': 'father_mode'}
+
+# no table relation between two terms of a root block
+NO_RANK = 255
+
+
+def _inverse(masks):
+    """The bitmasks of the inverse relations of the forward and symmetric relations bitmasks `masks`."""
+    return ((masks & _FORWARD_MASK) << 1) | (masks & _SYMMETRIC_MASK)
+
+
+def _condensed_index(n, p, q):
+    """Position of the pairs (p, q), p < q, in the condensed upper triangle of a n x n matrix."""
+    return n * p - p * (p + 1) // 2 + (q - p - 1)
+
+
+def _ranges(lengths):
+    """The positions in each of the consecutive ranges of sizes `lengths` (eg. [2, 3] -> [0, 1, 0, 1, 2])."""
+    ends = np.cumsum(lengths)
+    return np.arange(ends[-1] if len(ends) else 0, dtype=np.int64) - np.repeat(ends - lengths, lengths)
+
+
+def _csr_rows(matrix, indices):
+    """The coo arrays (rows, columns, data) of the rows `indices` of the csr matrix, the rows are positions in
+    `indices`."""
+    starts = matrix.indptr[indices].astype(np.int64)
+    lengths = matrix.indptr[indices + 1] - starts
+    positions = np.repeat(starts, lengths) + _ranges(lengths)
+    return np.repeat(np.arange(len(indices), dtype=np.int64), lengths), matrix.indices[positions], \
+        matrix.data[positions]
+
+
 class RelationsGraph:
-    def __init__(self, dictionary):
+    """
+    The relations between the terms of a dictionary, exposed as uint32 bitmasks of the relation types (see
+    relations_mask). The storage has no duplicated relation:
+     - forward: a csr matrix (int32 indices, uint16 bitmasks) of the forward relations (FORWARD_RELATIONS) and of the
+     upper triangle of the symmetric relations (SYMMETRIC_RELATIONS). The inverse relations are read from its
+     transposition (reverse, built on load).
+     - tables: the table relations only exist between terms of the same root, they are stored as one block per root,
+     the condensed upper triangle of the table rank (uint8, NO_RANK if none) between the terms of the root.
+
+    The per relation type matrices and the full adjacency matrix are derived on demand.
+
+    In lazy mode, the relations of a root block (contains, siblings and tables) are computed the first time a term of
+    the root is queried, the father relations are computed for the queried terms only (the child relations need the
+    father relations of all the terms). If persist is set, the dictionary cache is saved after each computation.
+    """
+    def __init__(self, dictionary, lazy=LAZY_RELATIONS, persist=PERSIST_LAZY_RELATIONS):
         super().__init__()
 
         self.dictionary = dictionary
-        self.relations = None
-        self._compute_relations()
+        self.persist = persist
+        self._decompositions = {}
+        self._compute_relations(lazy=lazy)
 
     def __getitem__(self, item):
         if isinstance(item, str) and item in RELATIONS:
-            return self.relations[item]
+            return self.relation(item)
 
         if isinstance(item, int):
-            return self.relations[RELATIONS[item]]
+            return self.relation(RELATIONS[item])
 
         from .terms import Term
         if isinstance(item, Term):
@@ -90,90 +171,383 @@ class RelationsGraph:
 
         raise NotImplemented
 
-    def relation_type(self, term, relation_type):
-        return [self.dictionary.index[j] for j in
-                self.relations[relation_type][term.index, :].indices]
-
-    def neighbours(self, term):
-        return {
-            reltype: self.relation_type(term, reltype) for reltype in RELATIONS
-        }
+    def relation(self, reltype):
+        """The boolean csr matrix of the relation type `reltype`."""
+        if reltype not in self._views:
+            self._views[reltype] = self._types_matrix(relations_mask([reltype]))
 
-    def _compute_relations(self):
-        logger.log(logging.INFO, "Computing relations")
+        return self._views[reltype]
 
-        self.relations = {}
-        contains = self._compute_contains()
-        self.relations['contains'] = csr_matrix(contains)
-        self.relations['contained'] = csr_matrix(self.relations['contains'].transpose())
-
-        father = self._compute_father()
-
-        for i, r in enumerate(['_substance', '_attribute', '_mode']):
-            self.relations['father' + r] = dok_matrix(father[i])
-
-        siblings = self._compute_siblings()
-        self.relations['opposed'] = dok_matrix(siblings[0])
-        self.relations['associated'] = dok_matrix(siblings[1])
-        self.relations['crossed'] = dok_matrix(siblings[2])
-        self.relations['twin'] = dok_matrix(siblings[3])
-
-        # self._do_inhibitions()
+    @property
+    def adjacency(self):
+        """The full csr adjacency matrix of the uint32 relation types bitmasks (derived on first access and shared,
+        not to be modified)."""
+        if 'adjacency' not in self._views:
+            matrix = self.neighbours_of(np.arange(self.size))
+            self._views['adjacency'] = matrix
 
-        for i, r in enumerate(['_substance', '_attribute', '_mode']):
-            self.relations['child' + r] = self.relations['father' + r].transpose()
+        return self._views['adjacency']
 
-        # self.relations['siblings'] = sum(siblings)
-        # self.relations['inclusion'] = np.clip(self.relations['contains'] + self.relations['contained'], 0, 1)
-        # self.relations['father'] = self.relations['father_substance'] + \
-        #                            self.relations['father_attribute'] + \
-        #                            self.relations['father_mode']
-        # self.relations['child'] = self.relations['child_substance'] + \
-        #                           self.relations['child_attribute'] + \
-        #                           self.relations['child_mode']
-        # self.relations['etymology'] = self.relations['father'] + self.relations['child']
+    @property
+    def nbytes(self):
+        """The memory used by the relations storage."""
+        arrays = [self.forward.data, self.forward.indices, self.forward.indptr,
+                  self.reverse.data, self.reverse.indices, self.reverse.indptr,
+                  self.members, self.members_indptr, self.tables_rank, self.tables_offset,
+                  self.term_block, self.term_position]
+        return sum(a.nbytes for a in arrays)
+
+    def _table_rows(self, indices):
+        """The coo arrays (rows, columns, bitmasks) of the table relations of the terms `indices`, the rows are
+        positions in `indices`."""
+        rows = np.flatnonzero(self.term_block[indices] != -1)
+        blocks = self.term_block[indices[rows]].astype(np.int64)
+        n = self.members_indptr[blocks + 1] - self.members_indptr[blocks]
+
+        # every (term, other member of its block) pair
+        rows, blocks, p, q = np.repeat(rows, n), np.repeat(blocks, n), \
+            np.repeat(self.term_position[indices[rows]].astype(np.int64), n), _ranges(n)
+        keep = p != q
+        rows, blocks, p, q, n = rows[keep], blocks[keep], p[keep], q[keep], np.repeat(n, n)[keep]
+
+        ranks = self.tables_rank[self.tables_offset[blocks] + _condensed_index(n, np.minimum(p, q), np.maximum(p, q))]
+        keep = ranks != NO_RANK
+        return rows[keep], self.members[self.members_indptr[blocks[keep]] + q[keep]], \
+            np.left_shift(1, _TABLE_BIT + ranks[keep].astype(np.uint32)).astype(np.uint32)
+
+    def adjacency_row(self, index):
+        """The neighbours (sorted terms index) of the term `index` and the bitmasks of their relations."""
+        self._ensure([index])
+        return self._row(index)
+
+    def _row(self, index):
+        _, columns, masks = self._rows(np.array([index], dtype=np.int64))
+        return columns, masks
+
+    def _rows(self, indices):
+        """
+        The coo arrays (rows, columns, bitmasks) of the relations of the terms `indices` (int64 array), sorted by row
+        then column: the forward rows, the inverse of the reverse rows and the table relations, merged by bitwise or.
+        """
+        parts = [_csr_rows(self.forward, indices), _csr_rows(self.reverse, indices), self._table_rows(indices)]
+        rows = np.concatenate([r for r, _, _ in parts])
+        columns = np.concatenate([c for _, c, _ in parts]).astype(np.int32)
+        masks = np.concatenate([parts[0][2].astype(np.uint32), _inverse(parts[1][2].astype(np.uint32)), parts[2][2]])
+
+        order = np.lexsort((columns, rows))
+        rows, columns, masks = rows[order], columns[order], masks[order]
+        if len(rows) == 0:
+            return rows, columns, masks
+
+        starts = np.flatnonzero(np.concatenate([[True], (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])]))
+        return rows[starts], columns[starts], np.bitwise_or.reduceat(masks, starts)
 
-        table = self._compute_table_rank(self.relations['contained'])
-        for i in range(6):
-            self.relations['table_%d'%i] = table[i]
+    def relation_type(self, term, relation_type):
+        self._ensure([term.index], fathers=relation_type in FORWARD_RELATIONS[1:],
+                     children=relation_type in [INVERSE_RELATIONS[r] for r in FORWARD_RELATIONS[1:]])
+        columns, masks = self._row(term.index)
+        return [self.dictionary.index[j] for j in columns[(masks & relations_mask([relation_type])) != 0]]
 
-        missing = {s for s in RELATIONS if s not in self.relations}
-        if missing:
-            raise ValueError("Missing relations : {%s}"%", ".join(missing))
+    def neighbours(self, term):
+        return {
+            reltype: self.relation_type(term, reltype) for reltype in RELATIONS
+        }
 
-        self.relations = {reltype: csr_matrix(self.relations[reltype]) for reltype in RELATIONS}
+    def neighbours_of(self, indices, types=None, coo=False):
+        """
+        The neighbours of the terms `indices` (terms index) through the relations `types` (default all).
+        :return: a csr matrix (len(indices), len(dictionary)) of uint32 relation types bitmask (see relations_mask),
+        or the coo arrays (rows, columns, bitmasks) if coo is True. The rows are positions in `indices`.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        self._ensure(indices)
+
+        rows, columns, masks = self._rows(indices)
+        masks &= relations_mask(types)
+        keep = masks != 0
+        rows, columns, masks = rows[keep], columns[keep], masks[keep]
+
+        if coo:
+            return rows.astype(np.int32), columns, masks
+
+        indptr = np.searchsorted(rows, np.arange(len(indices) + 1))
+        return csr_matrix((masks, columns, indptr), shape=(len(indices), self.size), dtype=np.uint32)
+
+    def relations_between(self, src_indices, dst_indices, types=None):
+        """
+        The relations from the terms `src_indices` to the terms `dst_indices` (terms index, pairwise).
+        :return: an uint32 array of relation types bitmask (see relations_mask), one per pair
+        """
+        if len(src_indices) == 0:
+            return np.zeros(0, dtype=np.uint32)
+
+        src = np.asarray(src_indices, dtype=np.int64)
+        dst = np.asarray(dst_indices, dtype=np.int64)
+        self._ensure(np.concatenate([src, dst]), children=False)
+
+        result = np.asarray(self.forward[src, dst]).ravel().astype(np.uint32) | \
+                 _inverse(np.asarray(self.forward[dst, src]).ravel().astype(np.uint32))
+
+        block = self.term_block[src]
+        same = (block != -1) & (block == self.term_block[dst]) & (src != dst)
+        if np.any(same):
+            block = block[same]
+            n = self.members_indptr[block + 1] - self.members_indptr[block]
+            p, q = self.term_position[src[same]], self.term_position[dst[same]]
+            ranks = self.tables_rank[self.tables_offset[block] +
+                                     _condensed_index(n, np.minimum(p, q), np.maximum(p, q))].astype(np.uint32)
+            result[same] |= np.where(ranks != NO_RANK, np.left_shift(1, _TABLE_BIT + ranks), 0).astype(np.uint32)
+
+        return result & relations_mask(types)
+
+    def _types_matrix(self, mask):
+        """The boolean csr matrix of the union of the relation types of the bitmask `mask`."""
+        key = ('types', int(mask))
+        if key not in self._views:
+            matrix = self.adjacency.copy()
+            matrix.data &= mask
+            matrix.eliminate_zeros()
+            self._views[key] = matrix.astype(bool)
+
+        return self._views[key]
+
+    def ancestors(self, prefix):
+        """
+        The etymology closure of the path `prefix`, a string of 's', 'a' and 'm' (eg. 'sa': the attributes of the
+        substances): a boolean csr matrix, [t0, t1] is True if t1 is reached from t0 by the father relations of the
+        prefix. Built by products of the father matrices, memoized by prefix.
+        """
+        key = ('ancestors', prefix)
+        if key not in self._views:
+            father = self.relation(ETYMOLOGY_FATHERS[prefix[-1]])
+            if len(prefix) == 1:
+                self._views[key] = father
+            else:
+                self._views[key] = (self.ancestors(prefix[:-1]) @ father).astype(bool)
+
+        return self._views[key]
+
+    def descendants(self, prefix):
+        """The transposition of the etymology closure of the path `prefix` (see ancestors)."""
+        key = ('descendants', prefix)
+        if key not in self._views:
+            self._views[key] = self.ancestors(prefix).transpose().tocsr()
+
+        return self._views[key]
+
+    def traverse(self, start, types=None, exclude=None, max_depth=1, max_per_depth=None):
+        """
+        The terms at most `max_depth` relations away from the terms `start` (terms index) through the relations
+        `types` (default all) minus `exclude`. The frontier of each depth is expanded with a sparse vector-matrix
+        product.
+        :param max_per_depth: if set, keep at most this number of new terms per depth (the smallest terms index)
+        :return: two int32 arrays, the terms index and their depth (0 for the start terms), sorted by depth and index
+        """
+        mask = relations_mask(types) & ~relations_mask(exclude if exclude is not None else [])
+        matrix = self._types_matrix(mask)
+
+        frontier = np.unique(np.asarray(start, dtype=np.int32))
+        seen = np.zeros(self.size, dtype=bool)
+        seen[frontier] = True
+
+        indices, depths = [frontier], [np.zeros(len(frontier), dtype=np.int32)]
+        for depth in range(1, max_depth + 1):
+            if len(frontier) == 0:
+                break
+
+            vector = csr_matrix((np.ones(len(frontier), dtype=bool), frontier, [0, len(frontier)]),
+                                shape=(1, self.size))
+            reached = (vector @ matrix).indices
+            frontier = np.sort(reached[~seen[reached]]).astype(np.int32)
+
+            if max_per_depth is not None:
+                frontier = frontier[:max_per_depth]
+
+            seen[frontier] = True
+            indices.append(frontier)
+            depths.append(np.full(len(frontier), depth, dtype=np.int32))
+
+        return np.concatenate(indices), np.concatenate(depths)
+
+    def _compute_relations(self, lazy=False):
+        logger.log(logging.INFO, "Computing relations%s" % (" (lazy)" if lazy else ""))
+
+        self.size = len(self.dictionary)
+        self.forward = csr_matrix((np.zeros(0, dtype=np.uint16), np.zeros(0, dtype=np.int32),
+                                   np.zeros(self.size + 1, dtype=np.int32)), shape=self.shape)
+        self._init_blocks([[t.index for t in terms] for terms in self.dictionary.roots.values()])
+        self._build_reverse()
+
+        if not lazy:
+            self._compute_blocks(np.arange(len(self.computed_blocks)))
+            self._compute_fathers(np.arange(self.size))
+            self._build_reverse()
+
+    def _init_blocks(self, blocks):
+        """Set the root blocks (the lists of the terms index of each root), without any table relation."""
+        blocks = [np.array(sorted(b), dtype=np.int32) for b in blocks]
+        self.members = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int32)
+        self.members_indptr = np.zeros(len(blocks) + 1, dtype=np.int64)
+        self.members_indptr[1:] = np.cumsum([len(b) for b in blocks])
+
+        sizes = [len(b) * (len(b) - 1) // 2 for b in blocks]
+        self.tables_rank = np.full(sum(sizes), NO_RANK, dtype=np.uint8)
+        self.tables_offset = np.zeros(len(blocks) + 1, dtype=np.int64)
+        self.tables_offset[1:] = np.cumsum(sizes)
+
+        self.computed_blocks = np.zeros(len(blocks), dtype=bool)
+        self.computed_fathers = np.zeros(self.size, dtype=bool)
+
+    def _members(self, block):
+        return self.members[self.members_indptr[block]:self.members_indptr[block + 1]]
+
+    def _ensure(self, indices, fathers=True, children=True):
+        """
+        Compute the missing relations of the terms `indices` in lazy mode: the relations of their root blocks, their
+        father relations and, if children is set, the father relations of all the terms.
+        """
+        if self.complete:
+            return
+
+        indices = np.asarray(indices, dtype=np.int64)
+        blocks = np.unique(self.term_block[indices])
+        blocks = blocks[blocks != -1]
+        blocks = blocks[~self.computed_blocks[blocks]]
+
+        if children:
+            terms = np.flatnonzero(~self.computed_fathers)
+        elif fathers:
+            terms = np.unique(indices[~self.computed_fathers[indices]])
+        else:
+            terms = []
+
+        if len(blocks) == 0 and len(terms) == 0:
+            return
+
+        self._compute_blocks(blocks)
+        self._compute_fathers(terms)
+        self._build_reverse()
+
+        if self.persist:
+            from .version import save_dictionary_to_cache
+            save_dictionary_to_cache(self.dictionary)
 
-    def _compute_table_rank(self, contained):
+    @property
+    def complete(self):
+        return self._complete
+
+    def _compute_blocks(self, blocks):
+        """Compute the contains, siblings and tables relations of the root blocks `blocks`."""
+        if len(blocks) == 0:
+            return
+
+        roots = [self.dictionary.index[self._members(b)[0]].root for b in blocks]
+
+        contains = self._compute_contains(roots)
+        siblings = self._compute_siblings(roots)
+        self._add_forward([('contains', contains)] + list(zip(SYMMETRIC_RELATIONS, siblings)))
+
+        self._compute_table_rank(contains, blocks)
+        self.computed_blocks[blocks] = True
+
+    def _compute_fathers(self, terms):
+        if len(terms) == 0:
+            return
+
+        father = self._compute_father([self.dictionary.index[i] for i in terms])
+        self._add_forward(list(zip(FORWARD_RELATIONS[1:], father)))
+        self.computed_fathers[terms] = True
+
+    def _add_forward(self, relations):
+        """Add the relations (list of (relation type, (rows, columns))) to the forward matrix."""
+        forward = self.forward
+        for reltype, (i, j) in relations:
+            matrix = csr_matrix(coo_matrix(([True] * len(i), (i, j)), shape=self.shape, dtype=bool), dtype=bool)
+            if reltype in SYMMETRIC_RELATIONS:
+                matrix = triu(matrix, format='csr')
+
+            forward = forward + matrix.astype(np.uint16) * np.uint16(relations_mask([reltype]))
+
+        self._set_forward(forward)
+
+    def _set_forward(self, forward):
+        forward = csr_matrix(forward)
+        forward.sort_indices()
+        self.forward = csr_matrix((forward.data.astype(np.uint16), forward.indices.astype(np.int32),
+                                   forward.indptr.astype(np.int32)), shape=forward.shape)
+
+    def _store(self, relations, blocks):
+        """
+        Build the storage from the matrices of each relation type.
+        :param relations: a dict relation type -> sparse matrix
+        :param blocks: the lists of the terms index of each root
+        """
+        self.size = relations['contains'].shape[0]
+
+        forward = csr_matrix((self.size, self.size), dtype=np.uint16)
+        for reltype in FORWARD_RELATIONS + SYMMETRIC_RELATIONS:
+            matrix = csr_matrix(relations[reltype], dtype=bool)
+            matrix.eliminate_zeros()
+            if reltype in SYMMETRIC_RELATIONS:
+                matrix = triu(matrix, format='csr')
+
+            forward = forward + matrix.astype(np.uint16) * np.uint16(relations_mask([reltype]))
+
+        self._set_forward(forward)
+        self._init_blocks(blocks)
+
+        for b in range(len(self.computed_blocks)):
+            members = self._members(b)
+            block = np.full((len(members), len(members)), NO_RANK, dtype=np.uint8)
+            for i, reltype in enumerate(TABLE_RELATIONS):
+                block[csr_matrix(relations[reltype])[members, :][:, members].toarray() != 0] = i
+
+            self.tables_rank[self.tables_offset[b]:self.tables_offset[b + 1]] = block[np.triu_indices(len(members), 1)]
+
+        self.computed_blocks[:] = True
+        self.computed_fathers[:] = True
+        self._build_reverse()
+
+    def _build_reverse(self):
+        """The derived (not stored) structures: the transposition of forward and the position of the terms in the
+        root blocks."""
+        self.reverse = self.forward.transpose().tocsr()
+        self.reverse.sort_indices()
+
+        self.term_block = np.full(self.size, -1, dtype=np.int32)
+        self.term_position = np.zeros(self.size, dtype=np.int32)
+        for block in range(len(self.members_indptr) - 1):
+            members = self._members(block)
+            self.term_block[members] = block
+            self.term_position[members] = np.arange(len(members), dtype=np.int32)
+
+        self._complete = bool(np.all(self.computed_blocks) and np.all(self.computed_fathers))
+        self._views = {}
+
+    def _compute_table_rank(self, contains, blocks):
+        """Compute the table rank between the terms of each root block `blocks` from their contains relations."""
         logger.log(logging.DEBUG, "Computing tables relations")
 
-        tables_rank = [([], []) for _ in range(6)]
-
-        indices = [
-            set(l) for l in np.split(contained.indices, contained.indptr)[1:-1]
-        ]
+        contained = defaultdict(set)
+        for i, j in zip(*contains):
+            contained[j].add(i)
 
-        for root in self.dictionary.roots:
-            for t0, t1 in combinations(self.dictionary.roots[root], 2):
-                commons = [self.dictionary.index[i] for i in indices[t0.index] & indices[t1.index]]
+        for b in blocks:
+            ranks = []
+            for t0, t1 in combinations(self._members(b), 2):
+                commons = [self.dictionary.index[i] for i in contained[t0] & contained[t1]]
+                ranks.append(max(map(lambda t: t.rank, commons)))
 
-                rank = max(map(lambda t: t.rank, commons))
-                tables_rank[rank][0].extend((t0.index, t1.index))
-                tables_rank[rank][1].extend((t1.index, t0.index))
+            self.tables_rank[self.tables_offset[b]:self.tables_offset[b + 1]] = ranks
 
-        return [coo_matrix(([True]*len(i), (i, j)), shape=self.shape, dtype=np.bool) for i, j in tables_rank]
-
-    def _compute_contains(self):
+    def _compute_contains(self, roots):
         logger.log(logging.DEBUG, "Computing contains/contained relations")
         # contain/contained
 
-        # contains = coo_matrix(
-        #     ([True]*len(self.dictionary), (, list(range(len(self.dictionary))))),
-        #     shape=(len(self.dictionary), len(self.dictionary)), dtype=np.bool)
-        #     # np.diag(np.ones(len(self.dictionary), dtype=np.bool))
-
-        i = list(range(len(self.dictionary)))
-        j = list(range(len(self.dictionary)))
-        for r_p, v in self.dictionary.roots.items():
+        i = [t.index for r_p in roots for t in self.dictionary.roots[r_p]]
+        j = list(i)
+        for r_p in roots:
+            v = self.dictionary.roots[r_p]
             paradigms = {t for t in v if t.script.paradigm}
 
             for p in paradigms:
@@ -182,12 +556,12 @@ class RelationsGraph:
                 i.extend(repeat(p.index, len(_contains)))
                 j.extend(_contains)
 
-        return coo_matrix(([True] * len(i), (i, j)), shape=self.shape, dtype=np.bool)
-
-    def _compute_father(self):
-        logger.log(logging.DEBUG, "Computing father/child relations")
+        return i, j
 
-        def _recurse_script(script):
+    def _decompose(self, script):
+        """The terms index of the decomposition of the script in terms of the dictionary (memoized, the sub-scripts
+        are shared between many terms)."""
+        if script not in self._decompositions:
             result = []
             for sub_s in script.children if isinstance(script, AdditiveScript) else [script]:
                 if isinstance(sub_s, NullScript):
@@ -197,15 +571,20 @@ class RelationsGraph:
                     result.append(self.dictionary.terms[sub_s].index)
                 else:
                     if sub_s.layer > 0:
-                        result.extend(chain.from_iterable(_recurse_script(c) for c in sub_s.children))
+                        result.extend(chain.from_iterable(self._decompose(c) for c in sub_s.children))
+
+            self._decompositions[script] = result
+
+        return self._decompositions[script]
 
-            return result
+    def _compute_father(self, terms):
+        logger.log(logging.DEBUG, "Computing father/child relations")
 
         # father = coo_matrix((3, len(self.dictionary), len(self.dictionary)), dtype=np.bool)
 
         father = [([], []) for _ in range(3)]
 
-        for t in self.dictionary.terms.values():
+        for t in terms:
             s = t.script
 
             for sub_s in s if isinstance(s, AdditiveScript) else [s]:
@@ -216,13 +595,13 @@ class RelationsGraph:
                     if s in t.inhibitions:
                         continue
 
-                    fathers_indexes = _recurse_script(sub_s.children[i])
+                    fathers_indexes = self._decompose(sub_s.children[i])
                     father[i][0].extend(repeat(t.index, len(fathers_indexes)))
                     father[i][1].extend(fathers_indexes)
 
-        return [coo_matrix(([True] * len(i), (i, j)), shape=self.shape, dtype=np.bool) for i, j in father]
+        return father
 
-    def _compute_siblings(self):
+    def _compute_siblings(self, roots):
         # siblings
         # 1 dim => the sibling type
         #  -0 opposed
@@ -252,7 +631,7 @@ class RelationsGraph:
 
         logger.log(logging.DEBUG, "Computing siblings relations")
 
-        for root in self.dictionary.roots:
+        for root in roots:
             _inhib_opposed = 'opposed' not in root.inhibitions
             _inhib_associated = 'associated' not in root.inhibitions
             _inhib_crossed = 'crossed' not in root.inhibitions
@@ -296,22 +675,54 @@ class RelationsGraph:
 
                     # siblings[3, index0, index1] = True
 
-        return [coo_matrix(([True]*len(i), (i, j)), shape=self.shape, dtype=np.bool) for i, j in siblings]
+        return siblings
 
     @property
     def shape(self):
         return (len(self.dictionary), len(self.dictionary))
 
+    @classmethod
+    def from_relations(cls, dictionary, relations):
+        """
+        Build the graph from the matrices of each relation type.
+        :param relations: a dict relation type -> sparse matrix
+        """
+        graph = cls.__new__(cls)
+        graph.dictionary = dictionary
+        graph.persist = PERSIST_LAZY_RELATIONS
+        graph._decompositions = {}
+        graph._store(relations, blocks=cls._blocks(relations))
+        return graph
+
     def __setstate__(self, state):
-        self.relations = state['relations']
         self.dictionary = state['dictionary']
+        self.persist = PERSIST_LAZY_RELATIONS
+        self._decompositions = {}
+        for k in ('forward', 'members', 'members_indptr', 'tables_rank', 'tables_offset', 'computed_blocks',
+                  'computed_fathers'):
+            setattr(self, k, state[k])
+        self.size = self.forward.shape[0]
+        self._build_reverse()
 
     def __getstate__(self):
         return {
-            'relations': self.relations,
+            'forward': self.forward,
+            'members': self.members,
+            'members_indptr': self.members_indptr,
+            'tables_rank': self.tables_rank,
+            'tables_offset': self.tables_offset,
+            'computed_blocks': self.computed_blocks,
+            'computed_fathers': self.computed_fathers,
             'dictionary': self.dictionary
         }
 
+    @staticmethod
+    def _blocks(relations):
+        """The root blocks from the relations matrices: the connected components of contains/contained."""
+        n, labels = connected_components(csr_matrix(relations['contains'], dtype=bool), directed=False)
+        order = np.argsort(labels, kind='stable')
+        return np.split(order, np.flatnonzero(np.diff(labels[order])) + 1)
+
 
 class Relations:
     def __init__(self, term, relations_graph):
@@ -322,17 +733,10 @@ class Relations:
 
     @cached_property
     def neighbours(self):
-        rels = defaultdict(list)
-        for reltype in RELATIONS:
-            for t in self[reltype]:
-                rels[t].append(reltype)
-
-        neighbours = OrderedDict()
-
-        for t in sorted(rels):
-            neighbours[t] = rels[t]
-
-        return neighbours
+        # the adjacency columns are sorted by terms index, ie. by terms
+        columns, masks = self.relations_graph.adjacency_row(self.term.index)
+        return OrderedDict((self.relations_graph.dictionary.index[j], relation_types(mask))
+                           for j, mask in zip(columns, masks))
 
     def to(self, term, relations_types=None):
         if relations_types is None:
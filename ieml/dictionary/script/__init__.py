@@ -1,4 +1,4 @@
 from .script import Script, AdditiveScript, MultiplicativeScript, NullScript
-from .tools import factorize
+from .tools import factorize, union, intersection, difference, is_disjoint, disjoint_matrix
 from .operator import script, m
 from .parser import ScriptParser
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Compact binary encoding of the scripts.
+
+A script is encoded as a prefix-order byte stream of its nodes. Each node starts with a header byte
+(kind << 3 | layer) followed by:
+ - NULL: nothing,
+ - CHARACTER: the canonical byte of a layer 0 primitive, or the position of the remarkable multiplication for layer 1,
+ - MULTIPLICATIVE: the three children,
+ - ADDITIVE_LAYER_0: the canonical byte (the primitives set of the addition),
+ - ADDITIVE: the number of children (uint16, big endian) then the children.
+"""
+from functools import lru_cache
+
+from ...constants import character_value
+from ...exceptions import InvalidScript
+from .script import MultiplicativeScript, AdditiveScript, NullScript, REMARKABLE_MULTIPLICATION_SCRIPT, \
+    primitive_script
+
+NULL = 0
+CHARACTER = 1
+MULTIPLICATIVE = 2
+ADDITIVE_LAYER_0 = 3
+ADDITIVE = 4
+
+_REMARKABLE_MULTIPLICATIONS = sorted(REMARKABLE_MULTIPLICATION_SCRIPT)
+_REMARKABLE_MULTIPLICATIONS_INDEX = {c: i for i, c in enumerate(_REMARKABLE_MULTIPLICATIONS)}
+
+_PRIMITIVES_BY_VALUE = sorted(character_value.items(), key=lambda e: e[1])
+
+
+def _encode(script, result):
+    if isinstance(script, NullScript):
+        result.append(NULL << 3 | script.layer)
+    elif isinstance(script, MultiplicativeScript):
+        if script.character is not None:
+            result.append(CHARACTER << 3 | script.layer)
+            if script.layer == 0:
+                result += script.canonical
+            else:
+                result.append(_REMARKABLE_MULTIPLICATIONS_INDEX[script.character])
+        else:
+            result.append(MULTIPLICATIVE << 3 | script.layer)
+            for c in script.children:
+                _encode(c, result)
+    elif isinstance(script, AdditiveScript):
+        if script.layer == 0:
+            result.append(ADDITIVE_LAYER_0 << 3 | script.layer)
+            result += script.canonical
+        else:
+            result.append(ADDITIVE << 3 | script.layer)
+            result += len(script.children).to_bytes(2, 'big')
+            for c in script.children:
+                _encode(c, result)
+    else:
+        raise InvalidScript("Unable to encode the object %s." % str(script))
+
+
+def encode(script):
+    """Encode the script to bytes."""
+    result = bytearray()
+    _encode(script, result)
+    return bytes(result)
+
+
+# the scripts are immutable, the leaves are shared between the decoded scripts
+@lru_cache(maxsize=None)
+def _null(layer):
+    return NullScript(layer=layer)
+
+
+@lru_cache(maxsize=None)
+def _character(character):
+    return MultiplicativeScript(character=character)
+
+
+def _decode(data, pos):
+    header = data[pos]
+    kind, layer = header >> 3, header & 0x7
+    pos += 1
+
+    if kind == NULL:
+        return _null(layer), pos
+
+    if kind == CHARACTER:
+        if layer == 0:
+            return primitive_script(data[pos]), pos + 1
+
+        return _character(_REMARKABLE_MULTIPLICATIONS[data[pos]]), pos + 1
+
+    if kind == MULTIPLICATIVE:
+        children = []
+        for _ in range(3):
+            child, pos = _decode(data, pos)
+            children.append(child)
+
+        return MultiplicativeScript(children=children), pos
+
+    if kind == ADDITIVE_LAYER_0:
+        value = data[pos]
+        return AdditiveScript(children=[primitive_script(v) for _, v in _PRIMITIVES_BY_VALUE if value & v]), pos + 1
+
+    if kind == ADDITIVE:
+        count = int.from_bytes(data[pos:pos + 2], 'big')
+        pos += 2
+        children = []
+        for _ in range(count):
+            child, pos = _decode(data, pos)
+            children.append(child)
+
+        return AdditiveScript(children=children), pos
+
+    raise InvalidScript("Invalid node kind %d in the encoded script." % kind)
+
+
+def decode(data):
+    """Decode a script from the bytes produced by `encode` (bytes, bytearray or memoryview)."""
+    if not isinstance(data, bytes):
+        data = bytes(data)
+
+    return _decode_bytes(data)
+
+
+@lru_cache(maxsize=10000)
+def _decode_bytes(data):
+    try:
+        script, pos = _decode(data, 0)
+    except (IndexError, KeyError) as e:
+        raise InvalidScript("Truncated or invalid encoded script (%s)." % str(e))
+
+    if pos != len(data):
+        raise InvalidScript("Trailing bytes after the encoded script.")
+
+    return script
@@ -1,4 +1,6 @@
 import itertools
+from functools import lru_cache
+
 import numpy as np
 
 from ...exceptions import InvalidScriptCharacter, InvalidScript, IncompatiblesScriptsLayers, TooManySingularSequences
@@ -160,17 +162,24 @@ class Script(TreeStructure):
 
     def _build_tables(self):
         if self.cardinal == 1:
-            self._cells = [np.array([[[self]]])]
+            self._cells = [np.zeros((1, 1, 1), dtype=np.int32)]
             self._tables_script = [self]
         else:
             self._cells, self._tables_script = self._compute_cells()
 
     @property
     def cells(self):
+        """The list of the tables of this script. Each table is a 3d int32 array (rows, columns, tabs) holding the
+        position of the cell in the singular sequences list."""
         if self._cells is None:
             self._build_tables()
         return self._cells
 
+    def _singular_sequences_index(self, sequences):
+        """Return an int32 array mapping each sequence of `sequences` to its position in our singular sequences."""
+        ss_index = {s: i for i, s in enumerate(self.singular_sequences)}
+        return np.array([ss_index[s] for s in sequences], dtype=np.int32)
+
     @property
     def tables_script(self):
         if self._tables_script is None:
@@ -299,9 +308,15 @@ class AdditiveScript(Script):
 
         if any(not c.paradigm for c in self.children):
             # layer 0 -> column paradigm (like I: F: M: O:)
-            return [np.array([[[s]] for s in self.singular_sequences])], [self]
+            return [np.arange(self.cardinal, dtype=np.int32).reshape((self.cardinal, 1, 1))], [self]
 
-        return [t for c in self.children for t in c.cells], [t for c in self.children for t in c.tables_script]
+        # translate the children ss positions as ours
+        cells = []
+        for c in self.children:
+            map_seq = self._singular_sequences_index(c.singular_sequences)
+            cells.extend(map_seq[t] for t in c.cells)
+
+        return cells, [t for c in self.children for t in c.tables_script]
 
 
 class MultiplicativeScript(Script):
@@ -454,18 +469,16 @@ class MultiplicativeScript(Script):
             # only one plural child, we recurse
             v = plurals_child[0]
 
-            # translate the child ss as ours
-            map_seq = {s.children[v[1]]: s for s in self.singular_sequences}
-
-            def resolve_ss(s):
-                return map_seq[s]
+            # translate the child ss positions as ours
+            map_seq = {s.children[v[1]]: i for i, s in enumerate(self.singular_sequences)}
+            map_seq = np.array([map_seq[s] for s in v[0].singular_sequences], dtype=np.int32)
 
             def map_script(s):
                 return MultiplicativeScript(children=[
                     self.children[i] if i != v[1] else s for i in range(3)
                 ])
 
-            return [np.vectorize(resolve_ss)(c) for c in v[0].cells], [map_script(c) for c in v[0].tables_script]
+            return [map_seq[c] for c in v[0].cells], [map_script(c) for c in v[0].tables_script]
 
         # more than one plural var, we build a multidimensional array
         # Check the table dimension
@@ -477,16 +490,16 @@ class MultiplicativeScript(Script):
         # 2nd dim the columns
         # 3rd dim the tabs
         result = np.zeros(shape=[plurals_child[i][0].cardinal if i < len(plurals_child)
-                                 else 1 for i in range(3)], dtype=object)
+                                 else 1 for i in range(3)], dtype=np.int32)
 
         seq_index = [{s:i for i, s in enumerate(v[0].singular_sequences)} for v in plurals_child]
 
-        for s in self.singular_sequences:
-            res = [None, None, None]
+        for j, s in enumerate(self.singular_sequences):
+            res = [0, 0, 0]
             for i, v in enumerate(plurals_child):
                 res[i] = seq_index[i][s.children[v[1]]]
 
-            result[res[0], res[1], res[2]] = s
+            result[res[0], res[1], res[2]] = j
 
         if len(plurals_child) == 3:
             tables_script = [MultiplicativeScript(children=[self.children[0], self.children[1], ss])
@@ -529,6 +542,18 @@ class NullScript(Script):
 
 NULL_SCRIPTS = [NullScript(level) for level in range(0, MAX_LAYER)]
 
+_CHARACTER_BY_VALUE = {v: c for c, v in character_value.items()}
+
+
+@lru_cache(maxsize=None)
+def primitive_script(value):
+    """The layer 0 script of the canonical byte `value` of a primitive (or of the null script E), shared between the
+    callers as the scripts are immutable."""
+    if value == character_value['E']:
+        return NULL_SCRIPTS[0]
+
+    return MultiplicativeScript(character=_CHARACTER_BY_VALUE[value])
+
 # Building the remarkable multiplication to parser
 REMARKABLE_MULTIPLICATION_SCRIPT = {
     "wo": [MultiplicativeScript(character='U'), MultiplicativeScript(character='U'), NullScript(layer=0)],
@@ -1,8 +1,17 @@
 import itertools as it
+import math
+from functools import lru_cache, partial, reduce
+
 import numpy as np
 from bidict import bidict
 
-from .script import MultiplicativeScript, Script, AdditiveScript, remarkable_multiplication_lookup_table
+from .script import MultiplicativeScript, Script, AdditiveScript, remarkable_multiplication_lookup_table, NULL_SCRIPTS, \
+    primitive_script
+from ...constants import character_value, PRIMITIVES
+from ...exceptions import InvalidScript
+
+_PRIMITIVE_VALUES = sorted(character_value[c] for c in PRIMITIVES)
+_NULL_VALUE = bytes([character_value['E']])
 
 
 def old_canonical(script_ast):
@@ -132,3 +141,104 @@ def factorize(script):
 def inverse_relation(relation_name):
     from ..relations import INVERSE_RELATIONS
     return INVERSE_RELATIONS[relation_name]
+
+
+@lru_cache(maxsize=10000)
+def _sequences(script):
+    """
+    The canonical bytes of the singular sequences of the script, as a sorted numpy array of bytes (dtype S3^layer). It
+    is computed from the structure of the script, the singular sequences are not built.
+    """
+    if script.layer == 0:
+        return np.array([bytes([v]) for v in _PRIMITIVE_VALUES if script.canonical[0] & v], dtype='S1')
+
+    if not script.paradigm:
+        return np.array([script.canonical], dtype='S%d' % len(script.canonical))
+
+    if isinstance(script, AdditiveScript):
+        return np.unique(np.concatenate([_sequences(c) for c in script.children]))
+
+    # the cartesian product of the sequences of the children, in lexicographic order
+    width = 3 ** (script.layer - 1)
+    s, a, m = (_sequences(c).view(np.uint8).reshape(-1, width) for c in script.children)
+    product = np.concatenate((np.repeat(s, len(a) * len(m), axis=0),
+                              np.tile(np.repeat(a, len(m), axis=0), (len(s), 1)),
+                              np.tile(m, (len(s) * len(a), 1))), axis=1)
+
+    return np.ascontiguousarray(product).view('S%d' % (3 * width)).ravel()
+
+
+def _check_layer(scripts):
+    if not scripts:
+        raise InvalidScript("No scripts to combine.")
+
+    for s in scripts:
+        if not isinstance(s, Script):
+            raise InvalidScript("Invalid object %s, expected a script." % str(s))
+
+    if len({s.layer for s in scripts}) != 1:
+        raise InvalidScript("Scripts of different layers can't be combined: %s." % ', '.join(map(str, scripts)))
+
+
+def _singular_sequence(canonical):
+    """The singular sequence script of the canonical bytes."""
+    if len(canonical) == 1:
+        return primitive_script(canonical[0])
+
+    if canonical == _NULL_VALUE * len(canonical):
+        return NULL_SCRIPTS[int(round(math.log(len(canonical), 3)))]
+
+    width = len(canonical) // 3
+    return MultiplicativeScript(children=[_singular_sequence(canonical[i * width:(i + 1) * width]) for i in range(3)])
+
+
+def _from_sequences(sequences):
+    if len(sequences) == 0:
+        return None
+
+    return factorize([_singular_sequence(bytes(c)) for c in sequences])
+
+
+def union(*scripts):
+    """The factorized script of the union of the singular sequences of the scripts."""
+    _check_layer(scripts)
+    return _from_sequences(reduce(np.union1d, (_sequences(s) for s in scripts)))
+
+
+def intersection(*scripts):
+    """The factorized script of the common singular sequences of the scripts, None if there are none."""
+    _check_layer(scripts)
+    return _from_sequences(reduce(partial(np.intersect1d, assume_unique=True), (_sequences(s) for s in scripts)))
+
+
+def difference(script, *others):
+    """The factorized script of the singular sequences of script that are not in the others, None if there are
+    none."""
+    _check_layer((script,) + others)
+    result = _sequences(script)
+    for s in others:
+        result = np.setdiff1d(result, _sequences(s), assume_unique=True)
+
+    return _from_sequences(result)
+
+
+def is_disjoint(script0, script1):
+    _check_layer((script0, script1))
+    return len(np.intersect1d(_sequences(script0), _sequences(script1), assume_unique=True)) == 0
+
+
+def disjoint_matrix(scripts):
+    """
+    Pairwise disjointness of a list of scripts of the same layer.
+    :return: a symmetric boolean numpy array, True where the two scripts have no singular sequences in common
+    """
+    _check_layer(scripts)
+
+    # the columns are the singular sequences of all the scripts
+    sequences = [_sequences(s) for s in scripts]
+    _, columns = np.unique(np.concatenate(sequences), return_inverse=True)
+
+    membership = np.zeros((len(scripts), columns.max() + 1), dtype=np.int32)
+    membership[np.repeat(np.arange(len(scripts)), [len(s) for s in sequences]), columns] = 1
+
+    return membership.dot(membership.transpose()) == 0
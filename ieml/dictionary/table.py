@@ -3,7 +3,7 @@ import numpy as np
 from ieml.commons import cached_property
 from ieml.dictionary.script import script
 from .terms import Term
-from .script import Script, factorize
+from .script import Script
 
 
 class Table(Term):
@@ -35,6 +35,14 @@ class Cell(Term):
         return 6
 
 
+def _terms_array(dictionary, indices):
+    """Resolve an array of terms index to an array of Term objects."""
+    result = np.empty(indices.shape, dtype=object)
+    for i, index in np.ndenumerate(indices):
+        result[i] = dictionary.index[index]
+    return result
+
+
 class Table2D(Table):
     def __init__(self, script, index, dictionary, parent, regular=False):
         super().__init__(script, index, dictionary, parent, regular)
@@ -42,44 +50,49 @@ class Table2D(Table):
         if script.tables_script[0] != script or self.script.cells[0].shape[2] != 1 or self.script.cells[0].shape[1] == 1:
             raise ValueError("Invalid script for Table creation: %s. Expected a script that lead a 2d table"%str(script))
 
-        self._index = None
-
     @property
     def shape(self):
-        return self.cells.shape
+        return self.cells_index.shape
 
     @cached_property
     def rows(self):
-        return [self.dictionary.terms[row] if row in self.dictionary else None
-                for row in self.script_rows]
+        return [self.dictionary.index[i] if i != -1 else None
+                for i in self.dictionary.tables_headers.layout(self.index)[0]['rows'][0]]
 
     @cached_property
     def script_rows(self):
-        return [factorize([t.script for t in line]) for line in self.cells]
+        return self.dictionary.tables_headers.script_rows(self.index)
 
     @cached_property
     def columns(self):
-        return [self.dictionary.terms[column] if column in self.dictionary else None
-                for column in self.script_columns]
+        return [self.dictionary.index[i] if i != -1 else None
+                for i in self.dictionary.tables_headers.layout(self.index)[0]['columns'][0]]
 
     @cached_property
     def script_columns(self):
-        return [factorize([t.script for t in line]) for line in self.cells.transpose()]
+        return self.dictionary.tables_headers.script_columns(self.index)
+
+    @property
+    def cells_index(self):
+        return self.dictionary.tables_index.table_cells(self.index)
 
     @cached_property
     def cells(self):
-        return np.vectorize(lambda sc: self.dictionary.terms[sc])(self.script.cells[0][:, :, 0])
+        return _terms_array(self.dictionary, self.cells_index)
 
     def __getitem__(self, item):
-        return self.cells[item]
+        res = self.cells_index[item]
+        if isinstance(res, np.ndarray):
+            return _terms_array(self.dictionary, res)
+
+        return self.dictionary.index[res]
 
     def index_of(self, item):
-        if self._index is None:
-            self._index = {
-                t.script: index for index, t in np.ndenumerate(self.cells)
-            }
+        return self.dictionary.tables_index.coordinates(self.index, self.dictionary.terms[script(item)].index)
 
-        return self._index[script(item)]
+    def _coordinates(self, script):
+        ss_index = [self.dictionary.terms[ss].index for ss in script.singular_sequences]
+        return sorted(map(tuple, self.dictionary.tables_index.coordinates(self.index, ss_index).tolist()))
 
     def accept_script(self, script):
         """
@@ -142,7 +155,7 @@ class Table2D(Table):
         if self.rank != 0 and self.rank % 2 == 0:
             return False, False
 
-        coords = sorted([self.index_of(ss) for ss in script.singular_sequences])
+        coords = self._coordinates(script)
 
         is_dim, count = is_dim_subset(coords)
         if is_dim and count == 1:
@@ -158,34 +171,37 @@ class Table2D(Table):
 
 
 class Table1D(Table):
-    def __init__(self, script, index, dictionary, parent, regular=False):
-        super().__init__(script, index, dictionary, parent, regular)
-        self._index = None
-
     @property
     def shape(self):
-        return self.cells.shape
+        return self.cells_index.shape
+
+    @property
+    def cells_index(self):
+        return self.dictionary.tables_index.table_cells(self.index)
 
     @cached_property
     def cells(self):
-        return np.vectorize(lambda sc: self.dictionary.terms[sc])(self.script.cells[0][:, 0, 0])
+        return _terms_array(self.dictionary, self.cells_index)
 
     def __getitem__(self, item):
-        return self.cells[item]
+        res = self.cells_index[item]
+        if isinstance(res, np.ndarray):
+            return _terms_array(self.dictionary, res)
+
+        return self.dictionary.index[res]
 
     def index_of(self, item):
-        if self._index is None:
-            self._index = {
-                t.script: index for index, t in np.ndenumerate(self.cells)
-            }
+        return self.dictionary.tables_index.coordinates(self.index, self.dictionary.terms[script(item)].index)
 
-        return self._index[script(item)]
+    def _coordinates(self, script):
+        ss_index = [self.dictionary.terms[ss].index for ss in script.singular_sequences]
+        return sorted(map(tuple, self.dictionary.tables_index.coordinates(self.index, ss_index).tolist()))
 
     def accept_script(self, script):
         if script not in self.script:
             return False, False
 
-        coords = sorted([self.index_of(ss) for ss in script.singular_sequences])
+        coords = self._coordinates(script)
 
         if len(coords) == coords[-1][0] - coords[0][0] + 1:
             return True, True
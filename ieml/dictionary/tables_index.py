@@ -0,0 +1,153 @@
+import logging
+
+import numpy as np
+
+from .table import table_class, Table1D, Table2D
+
+logger = logging.getLogger(__name__)
+
+
+class TablesIndex:
+    """
+    Precomputed index of the 1d and 2d tables of a dictionary, over the terms index:
+     - root: the root paradigm of each term,
+     - the cells of each table, as a flat int32 array of terms index,
+     - for each singular sequence, the tables that contain it and its coordinates in each of them,
+     - for each paradigm, the packed membership mask of its singular sequences over the ones of its root.
+
+    Built from the scripts only, so it is available before the terms are defined and is stored in the dictionary
+    cache.
+    """
+    def __init__(self, scripts, roots):
+        """
+        :param scripts: the sorted list of the scripts of the dictionary (the position is the term index)
+        :param roots: the list of the root paradigms scripts
+        """
+        script_index = {s: i for i, s in enumerate(scripts)}
+        self.size = len(scripts)
+
+        logger.log(logging.DEBUG, "Computing tables index")
+
+        self.root = np.full(self.size, -1, dtype=np.int32)
+        for r in roots:
+            self.root[[script_index[ss] for ss in r.singular_sequences]] = script_index[r]
+
+        # the root of a paradigm is the root of its singular sequences
+        paradigms = [i for i, s in enumerate(scripts) if s.cardinal != 1]
+        self.root[paradigms] = self.root[[script_index[scripts[i].singular_sequences[0]] for i in paradigms]]
+
+        tables, shapes, cells = [], [], []
+        for i in paradigms:
+            s = scripts[i]
+            _class = table_class(s)
+            if _class is Table2D:
+                local_cells = s.cells[0][:, :, 0]
+            elif _class is Table1D:
+                local_cells = s.cells[0][:, 0:1, 0]
+            else:
+                continue
+
+            ss_index = np.array([script_index[ss] for ss in s.singular_sequences], dtype=np.int32)
+            tables.append(i)
+            shapes.append((local_cells.shape[0], local_cells.shape[1], 2 if _class is Table2D else 1))
+            cells.append(ss_index[local_cells].ravel())
+
+        self.tables = np.array(tables, dtype=np.int32)
+        # rows, columns, number of dimensions
+        self.shapes = np.array(shapes, dtype=np.int32).reshape((-1, 3))
+        self.cells_offset = np.zeros(len(tables) + 1, dtype=np.int64)
+        self.cells_offset[1:] = np.cumsum(self.shapes[:, 0] * self.shapes[:, 1])
+        self.cells = np.concatenate(cells).astype(np.int32) if cells else np.zeros(0, dtype=np.int32)
+
+        self.table_slot = np.full(self.size, -1, dtype=np.int32)
+        self.table_slot[self.tables] = np.arange(len(tables), dtype=np.int32)
+
+        # inverse index, sorted by (singular sequence, table)
+        slots = np.repeat(np.arange(len(tables), dtype=np.int32), np.diff(self.cells_offset))
+        positions = np.arange(len(self.cells), dtype=np.int64) - self.cells_offset[slots]
+        entries_table = self.tables[slots]
+
+        order = np.lexsort((entries_table, self.cells))
+        self.ss_tables = entries_table[order]
+        self.ss_coordinates = np.stack([positions[order] // self.shapes[slots[order], 1],
+                                        positions[order] % self.shapes[slots[order], 1]], axis=1).astype(np.int32)
+        self.ss_indptr = np.zeros(self.size + 1, dtype=np.int64)
+        self.ss_indptr[1:] = np.cumsum(np.bincount(self.cells[order], minlength=self.size))
+
+        self._keys = self.cells[order].astype(np.int64) * self.size + self.ss_tables
+
+        # containment masks, one array per root, a row per paradigm of the root
+        root_paradigms = {}
+        for i in paradigms:
+            root_paradigms.setdefault(self.root[i], []).append(i)
+
+        self.masks = {}
+        self.mask_row = np.full(self.size, -1, dtype=np.int32)
+        for r in roots:
+            members = root_paradigms.get(script_index[r], [])
+            if not members:
+                continue
+
+            position = {ss: i for i, ss in enumerate(r.singular_sequences)}
+            masks = np.zeros((len(members), len(position)), dtype=bool)
+            for row, i in enumerate(members):
+                masks[row, [position[ss] for ss in scripts[i].singular_sequences]] = True
+
+            self.masks[script_index[r]] = np.packbits(masks, axis=1)
+            self.mask_row[members] = np.arange(len(members), dtype=np.int32)
+
+    def root_of(self, index):
+        return self.root[index]
+
+    def table_cells(self, table):
+        """The cells of the table `table` (term index) as an int32 array of terms index."""
+        slot = self.table_slot[table]
+        if slot == -1:
+            raise KeyError(table)
+
+        rows, columns, dim = self.shapes[slot]
+        cells = self.cells[self.cells_offset[slot]:self.cells_offset[slot + 1]]
+        return cells.reshape((rows, columns)) if dim == 2 else cells
+
+    def containing(self, paradigm, candidates):
+        """
+        Filter the paradigms `candidates` (terms index, of the same root as `paradigm`) to keep the ones whose
+        singular sequences include all the singular sequences of `paradigm`.
+        """
+        masks = self.masks[self.root[paradigm]]
+        mask = masks[self.mask_row[paradigm]]
+
+        candidates = np.asarray(candidates, dtype=np.int32)
+        return candidates[np.all(masks[self.mask_row[candidates]] & mask == mask, axis=1)]
+
+    def tables_of(self, ss):
+        """The 1d and 2d tables (terms index) that contain the singular sequence `ss` (term index)."""
+        return self.ss_tables[self.ss_indptr[ss]:self.ss_indptr[ss + 1]]
+
+    def coordinates(self, table, ss):
+        """
+        The coordinates of the singular sequences `ss` (term index or array of terms index) in the table `table`.
+        :return: a tuple for a single singular sequence, an int32 array (n, dim) otherwise
+        """
+        keys = np.asarray(ss, dtype=np.int64) * self.size + table
+        pos = np.searchsorted(self._keys, keys)
+
+        pos_clipped = np.minimum(pos, len(self._keys) - 1)
+        if len(self._keys) == 0 or np.any(self._keys[pos_clipped] != keys):
+            raise KeyError(ss)
+
+        dim = self.shapes[self.table_slot[table], 2]
+        coords = self.ss_coordinates[pos_clipped][..., :dim]
+
+        if coords.ndim == 1:
+            return tuple(int(c) for c in coords)
+
+        return coords
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k != '_keys'}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._keys = np.repeat(np.arange(self.size, dtype=np.int64), np.diff(self.ss_indptr)) * self.size + \
+                     self.ss_tables
@@ -19,6 +19,10 @@ VERSIONS_FOLDER = os.path.join(ieml_folder, get_configuration().get('VERSIONS',
 if not os.path.isdir(VERSIONS_FOLDER):
     os.mkdir(VERSIONS_FOLDER)
 
+# version of the layout of the pickled dictionaries, to increment when the pickled state of the dictionary, its scripts,
+# its relations or its tables changes: the caches of the other layouts are ignored and rebuilt
+CACHE_FORMAT_VERSION = 2
+
 
 def get_available_dictionary_version():
     version_url = get_configuration().get('VERSIONS', 'versionsurl')
@@ -165,7 +169,7 @@ class DictionaryVersion(metaclass=DictionaryVersionSingleton):
 
     @property
     def cache(self):
-        file_name = "cache_%s.pkl" % str(self)
+        file_name = "cache_v%d_%s.pkl" % (CACHE_FORMAT_VERSION, str(self))
         return os.path.join(VERSIONS_FOLDER, file_name)
 
     @property
@@ -354,14 +358,16 @@ def create_dictionary_version(old_version=None, add=None, update=None, remove=No
         d = Dictionary.__new__(Dictionary)
         rel_graph = RelationsGraph.__new__(RelationsGraph)
         rel_graph.__setstate__({
-            'dictionary': d,
-            'relations': old_dict_state['relations'].__getstate__()['relations']
+            **old_dict_state['relations'].__getstate__(),
+            'dictionary': d
         })
 
         state = {
             'version': dictionary_version,
             'relations': rel_graph,
             'scripts': old_dict_state['scripts'],
+            'tables_index': old_dict_state['tables_index'],
+            'tables_headers': old_dict_state['tables_headers'],
         }
 
         d.__setstate__(state)
@@ -377,11 +383,21 @@ def save_dictionary_to_cache(dictionary):
     logger.log(logging.INFO, "Saving dictionary cache to disk (%s)" % dictionary.version.cache)
 
     with open(dictionary.version.cache, 'wb') as fp:
-        pickle.dump(dictionary, fp, protocol=4)
+        pickle.dump((CACHE_FORMAT_VERSION, dictionary), fp, protocol=4)
 
 
 def load_dictionary_from_cache(version):
+    """The cached dictionary, None if the cache is stale or unreadable (it has to be rebuilt)"""
     logger.log(logging.INFO, "Loading dictionary from disk (%s)" % version.cache)
 
-    with open(version.cache, 'rb') as fp:
-        return pickle.load(fp)
+    try:
+        with open(version.cache, 'rb') as fp:
+            format_version, dictionary = pickle.load(fp)
+
+        if format_version != CACHE_FORMAT_VERSION:
+            raise ValueError("cache format %s, expected %d" % (str(format_version), CACHE_FORMAT_VERSION))
+    except Exception as e:
+        logger.log(logging.WARNING, "Ignoring the invalid dictionary cache %s (%s)" % (version.cache, str(e)))
+        return None
+
+    return dictionary
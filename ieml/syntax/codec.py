@@ -0,0 +1,182 @@
+"""
+Compact binary encoding of the syntax trees.
+
+A tree is encoded as a record: its length (uint32, big endian), the dictionary version id (uint32, the seconds since
+the epoch of the version date) and the prefix-order stream of its nodes. Each node starts with a header byte, the
+syntax rank of its class (0 for a PropositionPath), with the bit 0x80 set if the node has literals, followed by:
+ - the literals if any: their count (uint8) then, for each, its utf-8 length (uint16) and its bytes,
+ - SyntaxTerm: the term index (int32),
+ - the other nodes: the number of children (uint16) then the children.
+
+The decoding uses the trusted construction (IEMLSyntax._from_validated), the nodes are not validated again. The
+records can be concatenated in a file and read by offset from a memory-mapped buffer (see dump and load).
+"""
+import calendar
+import datetime
+import struct
+from functools import lru_cache
+
+from ..dictionary.dictionary import Dictionary
+from ..dictionary.version import DictionaryVersion
+from ..exceptions import InvalidIEMLObjectArgument
+from .commons import IEMLSyntax
+from .terms import SyntaxTerm
+from .words import Morpheme, Word
+from .sentences import Clause, Sentence, SuperClause, SuperSentence
+from .texts import Text
+from .hypertexts import Hyperlink, Hypertext, PropositionPath
+
+PROPOSITION_PATH = 0
+LITERALS = 0x80
+
+_CLASSES = {cls.syntax_rank(): cls for cls in (SyntaxTerm, Morpheme, Word, Clause, Sentence, SuperClause,
+                                               SuperSentence, Text, Hyperlink, Hypertext)}
+_TERM = SyntaxTerm.syntax_rank()
+
+_UINT8 = struct.Struct('>B')
+_UINT16 = struct.Struct('>H')
+_UINT32 = struct.Struct('>I')
+_INT32 = struct.Struct('>i')
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+@lru_cache(maxsize=100)
+def version_id(version):
+    """The id of the dictionary version, the seconds since the epoch of its date."""
+    return calendar.timegm(DictionaryVersion(version).date.timetuple())
+
+
+def version_from_id(id):
+    return DictionaryVersion(_EPOCH + datetime.timedelta(seconds=id))
+
+
+def _encode(node, result):
+    if isinstance(node, PropositionPath):
+        result.append(PROPOSITION_PATH)
+        children = node.path
+    else:
+        if not isinstance(node, IEMLSyntax):
+            raise InvalidIEMLObjectArgument(IEMLSyntax, "Unable to encode the object %s." % str(node))
+
+        if node.literals:
+            result.append(node.__class__.syntax_rank() | LITERALS)
+            result += _UINT8.pack(len(node.literals))
+            for l in node.literals:
+                l = l.encode()
+                result += _UINT16.pack(len(l))
+                result += l
+        else:
+            result.append(node.__class__.syntax_rank())
+
+        if isinstance(node, SyntaxTerm):
+            result += _INT32.pack(node.term.index)
+            return
+
+        children = node.children
+
+    result += _UINT16.pack(len(children))
+    for c in children:
+        _encode(c, result)
+
+
+def encode(node):
+    """Encode the syntax tree to a record (bytes)."""
+    result = bytearray(8)
+    _UINT32.pack_into(result, 4, version_id(node.dictionary_version))
+    _encode(node, result)
+    _UINT32.pack_into(result, 0, len(result) - 4)
+    return bytes(result)
+
+
+def _decode(data, pos, terms):
+    header = data[pos]
+    kind = header & 0x7f
+    pos += 1
+
+    literals = ()
+    if header & LITERALS:
+        count = data[pos]
+        pos += 1
+        literals = []
+        for _ in range(count):
+            length, = _UINT16.unpack_from(data, pos)
+            literals.append(bytes(data[pos + 2:pos + 2 + length]).decode())
+            pos += 2 + length
+
+    if kind == _TERM:
+        index, = _INT32.unpack_from(data, pos)
+        if index < 0:
+            raise IndexError("negative term index %d" % index)
+        return SyntaxTerm._from_validated(terms[index], literals), pos + 4
+
+    count, = _UINT16.unpack_from(data, pos)
+    pos += 2
+    children = []
+    for _ in range(count):
+        child, pos = _decode(data, pos, terms)
+        children.append(child)
+
+    if kind == PROPOSITION_PATH:
+        return PropositionPath(children), pos
+
+    return _CLASSES[kind]._from_validated(children, literals), pos
+
+
+def _decode_record(data, offset, terms):
+    try:
+        length, id = struct.unpack_from('>II', data, offset)
+        end = offset + 4 + length
+        if id not in terms:
+            terms[id] = Dictionary(version_from_id(id)).index
+
+        node, pos = _decode(data, offset + 8, terms[id])
+    except (IndexError, KeyError, struct.error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidIEMLObjectArgument(IEMLSyntax, "Truncated or invalid encoded syntax tree (%s)." % str(e))
+
+    if pos != end:
+        raise InvalidIEMLObjectArgument(IEMLSyntax, "Invalid length for the encoded syntax tree.")
+
+    return node, end
+
+
+def decode(data, offset=0):
+    """
+    Decode the syntax tree of the record at the offset of the buffer (bytes, memoryview or mmap).
+    :return: the syntax tree
+    """
+    return _decode_record(data, offset, {})[0]
+
+
+def decode_from(data, offset=0):
+    """
+    Decode the record at the offset of the buffer.
+    :return: the syntax tree and the offset of the next record
+    """
+    return _decode_record(data, offset, {})
+
+
+def dump(nodes, fp):
+    """
+    Write the records of the syntax trees in the binary file.
+    :return: the offsets of the records in the file
+    """
+    offsets = []
+    offset = fp.tell()
+    for n in nodes:
+        record = encode(n)
+        fp.write(record)
+        offsets.append(offset)
+        offset += len(record)
+
+    return offsets
+
+
+def load(data):
+    """Iterate over the syntax trees of the records in the buffer (bytes, memoryview or mmap of a file)."""
+    # the terms of the dictionary by version id
+    terms = {}
+    offset = 0
+    while offset < len(data):
+        node, offset = _decode_record(data, offset, terms)
+        yield node
@@ -1,6 +1,28 @@
+import copy
+import hashlib
+import weakref
+from operator import attrgetter
+
 from ieml.commons import TreeStructure
 from ieml.exceptions import InvalidIEMLObjectArgument
 
+# the canonical instance of each syntax node, indexed by IEMLSyntax._intern_key
+_INTERNED = weakref.WeakValueDictionary()
+
+# the key to sort the syntax nodes, faster than their comparison operators
+sort_key = attrgetter('sort_key')
+
+
+def merkle_digest(tag, data, children, digest_size=8):
+    """The blake2b digest of the node tag, its data (bytes) and the digests of its children."""
+    h = hashlib.blake2b(digest_size=digest_size)
+    h.update(bytes([tag, len(children) & 0xff]))
+    h.update(data)
+    for c in children:
+        h.update(c.merkle_digest(digest_size))
+
+    return h.digest()
+
 
 class IEMLSyntaxType(type):
     """This metaclass enables the comparison of class times, such as (Sentence > Word) == True"""
@@ -17,6 +39,10 @@ class IEMLSyntaxType(type):
 
         super(IEMLSyntaxType, cls).__init__(name, bases, dct)
 
+    def __call__(cls, *args, **kwargs):
+        """Hash-consing, return the existing node if an identical one has already been built"""
+        return super(IEMLSyntaxType, cls).__call__(*args, **kwargs)._intern()
+
     def __hash__(self):
         return self.__rank
 
@@ -48,6 +74,9 @@ class IEMLSyntaxType(type):
 class IEMLSyntax(TreeStructure, metaclass=IEMLSyntaxType):
     closable = False
 
+    # the digests of the node by size, see merkle_digest
+    _digests = None
+
     def __init__(self, children, literals=None):
         super().__init__()
         self.children = tuple(children)
@@ -74,27 +103,133 @@ class IEMLSyntax(TreeStructure, metaclass=IEMLSyntaxType):
                                                                     "str or a str."%str(literals))
 
         self.literals = tuple(_literals)
+        self.sort_key = self._compute_sort_key()
         self._do_precompute_str()
 
-    def set_dictionary_version(self, version):
+    @classmethod
+    def _from_validated(cls, children, literals=()):
+        """
+        Trusted construction, for the trees that have already been validated (deserialized for instance): the
+        arguments are not checked. The children must be interned and in the order of the children of the node built
+        by the constructor.
+        """
+        children, literals = tuple(children), tuple(literals)
+        node = _INTERNED.get((cls, tuple(id(c) for c in children), literals))
+        if node is not None:
+            return node
+
+        node = cls.__new__(cls)
+        node._set_validated(children, literals)
+        return node._intern()
+
+    def _set_validated(self, children, literals):
+        TreeStructure.__init__(self)
+        self.children = children
+        if children:
+            self.dictionary_version = children[0].dictionary_version
+
+        self.literals = literals
+        self._init_validated()
+        self.sort_key = self._compute_sort_key()
+        self._do_precompute_str()
+
+    def _init_validated(self):
+        """Set the attributes the constructor computes from the children, for the trusted construction"""
+        pass
+
+    def _compute_sort_key(self):
+        """The nodes are ordered by class, then by the lexicographic order of their children"""
+        return self.__class__.syntax_rank(), tuple(c.sort_key for c in self.children)
+
+    def _intern_key(self):
+        # the children are interned, their identity determines their structure
+        return self.__class__, tuple(id(c) for c in self.children), self.literals
+
+    def _intern(self):
+        self._key = self._intern_key()
+        return _INTERNED.setdefault(self._key, self)
+
+    def _translated(self, version):
+        """The interned node translated to the dictionary version, the nodes are immutable: this one is not modified."""
+        if self.dictionary_version == version:
+            return self
+
+        node = copy.copy(self)
+        node._set_translated_children(version)
+        return node._intern()
+
+    def _set_translated_children(self, version):
+        """Set the translations of the children, on a new copy of the node only"""
         self.dictionary_version = version
-        for c in self.children:
-            c.set_dictionary_version(version)
+        self.children = tuple(c._translated(version) for c in self.children)
+        self._init_validated()
+        self.sort_key = self._compute_sort_key()
 
         self._str = None
+        self._digests = None
         self._do_precompute_str()
 
+    def _merkle_data(self):
+        return '\x00'.join(self.literals).encode()
+
+    def merkle_digest(self, digest_size=8):
+        """
+        The Merkle digest of the node, computed from the digests of its children, the scripts of the terms and the
+        literals. It is stable across processes and dictionary versions (if the scripts are unchanged).
+        """
+        if self._digests is None:
+            self._digests = {}
+
+        if digest_size not in self._digests:
+            self._digests[digest_size] = merkle_digest(self.__class__.syntax_rank(), self._merkle_data(),
+                                                       self.children, digest_size)
+
+        return self._digests[digest_size]
+
+    def fingerprint(self, bits=64, dictionary_version=None):
+        """
+        The Merkle fingerprint of the node as an int of 64 or 128 bits, to be used as a persistent key.
+        :param dictionary_version: if set, the fingerprint is salted with the dictionary version
+        """
+        if bits not in (64, 128):
+            raise ValueError("Invalid fingerprint size %d, expected 64 or 128 bits." % bits)
+
+        digest = self.merkle_digest(bits // 8)
+        if dictionary_version is not None:
+            digest = hashlib.blake2b(digest, digest_size=bits // 8, key=str(dictionary_version).encode()).digest()
+
+        return int.from_bytes(digest, 'big')
+
+    def __eq__(self, other):
+        # interned nodes are equal if they are the same object, otherwise they are compared on what the Merkle digest
+        # covers (class, data and children), to be consistent with __hash__. A node is also equal to its IEML string,
+        # but it does not hash like it: the nodes and their strings can't be mixed as the keys of a dict or a set.
+        if self is other:
+            return True
+
+        if isinstance(other, str):
+            return self._str == other
+
+        if not isinstance(other, IEMLSyntax) or self.__class__ is not other.__class__:
+            return False
+
+        return self._merkle_data() == other._merkle_data() and len(self.children) == len(other.children) and \
+            all(IEMLSyntax.__eq__(c, o) for c, o in zip(self.children, other.children))
+
+    def __hash__(self):
+        return int.from_bytes(self.merkle_digest(), 'big')
+
     def __gt__(self, other):
         if not isinstance(other, IEMLSyntax):
-            raise NotImplemented
+            return NotImplemented
 
-        if self.__class__ != other.__class__:
-            return self.__class__ > other.__class__
+        return self.sort_key > other.sort_key
 
-        return self._do_gt(other)
+    def __lt__(self, other):
+        if not isinstance(other, IEMLSyntax):
+            return NotImplemented
 
-    def _do_gt(self, other):
-        return self.children > other.children
+        return self.sort_key < other.sort_key
 
     def compute_str(self, children_str):
         return '#'.join(children_str)
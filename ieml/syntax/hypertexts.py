@@ -1,6 +1,6 @@
 from collections import defaultdict
 
-from .commons import IEMLSyntax
+from .commons import IEMLSyntax, merkle_digest
 from ..constants import MAX_NODES_IN_HYPERTEXT, MAX_DEPTH_IN_HYPERTEXT
 from ..exceptions import InvalidIEMLObjectArgument, InvalidTreeStructure
 from ..dictionary import Term
@@ -26,6 +26,13 @@ class PropositionPath:
     def __hash__(self):
         return hash(self.path)
 
+    def merkle_digest(self, digest_size=8):
+        return merkle_digest(0, b'', self.path, digest_size)
+
+    @property
+    def sort_key(self):
+        return tuple(p.sort_key for p in self.path)
+
     def __eq__(self, other):
         if isinstance(other, PropositionPath):
             o = other.path
@@ -38,6 +45,10 @@ class PropositionPath:
     def end(self):
         return self.path[-1]
 
+    @property
+    def dictionary_version(self):
+        return self.path[0].dictionary_version
+
     def __gt__(self, other):
         raise NotImplemented
 
@@ -95,6 +106,9 @@ class Hyperlink(IEMLSyntax):
 class Hypertext(IEMLSyntax):
     closable = True
 
+    # None until the first use for the trusted construction
+    _tree_graph = None
+
     def __init__(self, children):
 
         try:
@@ -107,7 +121,7 @@ class Hypertext(IEMLSyntax):
                                             str(_children))
 
         try:
-            self.tree_graph = TreeGraph(((c.start, c.end, c) for c in _children))
+            self._tree_graph = TreeGraph(((c.start, c.end, c) for c in _children))
         except InvalidTreeStructure as e:
             raise InvalidIEMLObjectArgument(Hypertext, e.message)
 
@@ -122,6 +136,17 @@ class Hypertext(IEMLSyntax):
         #TODO sort the children
         super().__init__(_children)
 
+    def _init_validated(self):
+        # the hyperlinks are a valid tree, its graph is built without the checks on first use
+        self._tree_graph = None
+
+    @property
+    def tree_graph(self):
+        if self._tree_graph is None:
+            self._tree_graph = TreeGraph(((c.start, c.end, c) for c in self.children), validate=False)
+
+        return self._tree_graph
+
     def compute_str(self, children_str):
         def render_text(text):
             hyperlinks = defaultdict(lambda: list())
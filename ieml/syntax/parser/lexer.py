@@ -1,4 +1,4 @@
-import ply.lex as lxr
+import re
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,26 +19,42 @@ tokens = (
    'LITERAL',
 )
 
-
-def get_lexer(module=None):
-    t_TERM = TERM_REGEX
-    t_PLUS   = r'\+'
-    t_TIMES   = r'\*'
-    t_LPAREN  = r'\('
-    t_RPAREN  = r'\)'
-    t_LBRACKET = r'\['
-    t_RBRACKET  = r'\]'
-    t_L_CURLY_BRACKET = r'\{'
-    t_R_CURLY_BRACKET = r'\}'
-    t_SLASH = r'\/'
-    t_LITERAL = r'\<(\\\>|[^\>])+\>'
-#    t_USL_TAG = r'([A-Za-z0-9 _\./\\-]+)'
-
-    t_ignore  = ' \t\n'
-
-    # Error handling rule
-    def t_error(t):
-        logger.log(logging.ERROR, "Illegal character '%s'" % t.value[0])
-        t.lexer.skip(1)
-
-    return lxr.lex(module=module, errorlog=logging)
+_PUNCTUATION = {
+    '+': 'PLUS',
+    '*': 'TIMES',
+    '(': 'LPAREN',
+    ')': 'RPAREN',
+    '[': 'LBRACKET',
+    ']': 'RBRACKET',
+    '{': 'L_CURLY_BRACKET',
+    '}': 'R_CURLY_BRACKET',
+    '/': 'SLASH',
+}
+
+_TOKEN_REGEX = re.compile(r'[ \t\n]*(?:(%s)|([\+\*\(\)\[\]\{\}\/])|(\<(?:\\\>|[^\>])+\>)|(.))?' % TERM_REGEX, re.DOTALL)
+
+
+def tokenize(s):
+    """
+    The tokens of the string, a list of (type, value, position) tuples. The blanks are ignored, the illegal characters
+    are logged and skipped.
+    """
+    result = []
+    pos = 0
+    end = len(s)
+    match = _TOKEN_REGEX.match
+    while pos < end:
+        m = match(s, pos)
+        term, punctuation, literal, illegal = m.groups()
+        if term is not None:
+            result.append(('TERM', term, m.start(1)))
+        elif punctuation is not None:
+            result.append((_PUNCTUATION[punctuation], punctuation, m.start(2)))
+        elif literal is not None:
+            result.append(('LITERAL', literal, m.start(3)))
+        elif illegal is not None:
+            logger.log(logging.ERROR, "Illegal character '%s'" % illegal)
+
+        pos = m.end()
+
+    return result
@@ -1,38 +1,285 @@
-import logging
-import os
+import sys
+from collections import OrderedDict
 from functools import partial
-import ply.yacc as yacc
 
-from ieml.dictionary.terms import Term
-from ieml.dictionary.version import DictionaryVersion
 from ieml.dictionary.dictionary import Dictionary
 from ieml.dictionary.tools import term
 from ieml.exceptions import TermNotFoundInDictionary, InvalidIEMLObjectArgument
 from ieml.syntax.terms import SyntaxTerm
-from ... import parser_folder
 from ...exceptions import CannotParse
-from ieml.syntax import Word, Morpheme, Clause, SuperClause, Sentence, SuperSentence, Text, Hypertext, Hyperlink, PropositionPath
+from ieml.syntax import Word, Morpheme, Clause, SuperClause, Sentence, SuperSentence, Text
 
-from .lexer import get_lexer, tokens
+from .lexer import tokenize
+from ... import get_configuration
 import threading
 
-def _add(lp1, p2):
-    return lp1[0] + [p2[0]], lp1[1] + p2[1]
+PARSE_CACHE_SIZE = get_configuration().getint("PARSER", "parsecachesize")
+PARSE_CACHE_MEMORY = get_configuration().getint("PARSER", "parsecachememory") * 1024 * 1024
+# estimated memory of a syntax node (object, attributes dict, children tuple, string and sort key), in bytes
+NODE_MEMORY = 384
+
+# the class of the parenthesis group (substance * attribute * mode or a sum of terms) in a bracket of the class
+_CONTENTS = {Word: Morpheme, Sentence: Clause, SuperSentence: SuperClause}
+_BRACKETS = {v: k for k, v in _CONTENTS.items()}
+# the class of the elements of a parenthesis group of the class
+_ELEMENTS = {Morpheme: SyntaxTerm, Clause: Word, SuperClause: Sentence}
+_PARENTHESIS = {v: k for k, v in _ELEMENTS.items()}
+
+_ANY = (SyntaxTerm, Word, Sentence, SuperSentence)
+_CLOSED = (Word, Sentence, SuperSentence)
+
+_EOF = (None, None, -1)
+
+
+class _Parsing:
+    """
+    Recursive descent parsing of a string:
+
+    proposition : TERM | term | morpheme | word | clause | sentence | superclause | supersentence | text
+    term : [ TERM ] LITERAL*
+    morpheme : ( term (+ term)* )
+    word : [ morpheme (* morpheme)? ] LITERAL*
+    clause : ( decorated_word * decorated_word * decorated_word )
+    sentence : [ clause (+ clause)* ] LITERAL*
+    superclause : ( decorated_sentence * decorated_sentence * decorated_sentence )
+    supersentence : [ superclause (+ superclause)* ] LITERAL*
+    text : { (/ decorated_word | decorated_sentence | decorated_supersentence /)+ }
+    decorated_x : x text*
+
+    The kind of a bracket or of a parenthesis group is known at its first term, the expected kinds are passed down to
+    report the syntax errors at the first unexpected token. The texts decorating a proposition are hyperlinks, they are
+    parsed but not supported.
+    """
+    def __init__(self, s, get_term):
+        self.tokens = tokenize(s)
+        self.tokens.append(_EOF)
+        self.pos = 0
+        self.get_term = get_term
+
+    def _peek(self):
+        return self.tokens[self.pos][0]
+
+    def _next(self, type):
+        token = self.tokens[self.pos]
+        if token[0] != type:
+            self._error()
+
+        self.pos += 1
+        return token[1]
+
+    def _error(self):
+        type, value, lexpos = self.tokens[self.pos]
+        if type is None:
+            msg = "Syntax error at EOF"
+        else:
+            msg = "Syntax error at '%s' (%d, %d)" % (value, 1, lexpos)
+
+        raise CannotParse(None, msg)
+
+    def proposition(self):
+        type = self._peek()
+        if type == 'TERM':
+            result = SyntaxTerm(self._script())
+        elif type == 'LBRACKET':
+            result, _ = self._bracket(_ANY)
+        elif type == 'LPAREN':
+            result, _ = self._parenthesis(tuple(_ELEMENTS))
+        elif type == 'L_CURLY_BRACKET':
+            result = self._text()
+        else:
+            self._error()
+
+        if self._peek() is not None:
+            self._error()
 
+        return result
 
-def _build(*arg):
-    if len(arg) > 1:
-        _h = []
-        for e in arg[1:]:
-            for h in e[1]:
-                h[1].insert(0, arg[0])
-                _h.append(h)
-        return arg[0], _h
-    return arg[0], []
+    def _script(self):
+        value = self._next('TERM')
+        # as with the yacc parser, the term is looked up before the syntax errors at a closing bracket or at the end of
+        # the string, after the other ones
+        if self._peek() not in ('RBRACKET', None):
+            self._error()
 
+        try:
+            return self.get_term(value)
+        except TermNotFoundInDictionary as e:
+            raise CannotParse(None, str(e))
+
+    def _literals(self):
+        literals = None
+        while self._peek() == 'LITERAL':
+            if literals is None:
+                literals = []
+            literals.append(self._next('LITERAL')[1:-1])
+
+        return literals
+
+    def _bracket(self, classes):
+        """Parse a term, a word, a sentence or a supersentence of the classes, returns it and if it has hyperlinks"""
+        self._next('LBRACKET')
+        if self._peek() == 'TERM':
+            if SyntaxTerm not in classes:
+                self._error()
+
+            script = self._script()
+            self._next('RBRACKET')
+            return SyntaxTerm(script, literals=self._literals()), False
+
+        contents = tuple(_CONTENTS[c] for c in classes if c in _CONTENTS)
+        if not contents:
+            self._error()
+
+        first, hyperlinks = self._parenthesis(contents)
+        if isinstance(first, Morpheme):
+            flexing = None
+            if self._peek() == 'TIMES':
+                self.pos += 1
+                flexing, _ = self._parenthesis((Morpheme,))
+
+            self._next('RBRACKET')
+            return Word(root=first, flexing=flexing, literals=self._literals()), False
+
+        children = [first]
+        while self._peek() == 'PLUS':
+            self.pos += 1
+            child, _hyperlinks = self._parenthesis((first.__class__,))
+            children.append(child)
+            hyperlinks = hyperlinks or _hyperlinks
+
+        self._next('RBRACKET')
+        return _BRACKETS[first.__class__](children, literals=self._literals()), hyperlinks
+
+    def _parenthesis(self, classes):
+        """Parse a morpheme, a clause or a superclause of the classes, returns it and if it has hyperlinks"""
+        self._next('LPAREN')
+        first, hyperlinks = self._bracket(tuple(_ELEMENTS[c] for c in classes))
+        if isinstance(first, SyntaxTerm):
+            children = [first]
+            while self._peek() == 'PLUS':
+                self.pos += 1
+                children.append(self._bracket((SyntaxTerm,))[0])
+
+            self._next('RPAREN')
+            return Morpheme(children), False
+
+        children = [first]
+        hyperlinks = self._text_list() or hyperlinks
+        for _ in range(2):
+            self._next('TIMES')
+            child, _hyperlinks = self._bracket((first.__class__,))
+            children.append(child)
+            hyperlinks = self._text_list() or _hyperlinks or hyperlinks
+
+        self._next('RPAREN')
+        return _PARENTHESIS[first.__class__](substance=children[0], attribute=children[1], mode=children[2]), \
+            hyperlinks
+
+    def _text_list(self):
+        """Parse the texts decorating a proposition, returns if there is any"""
+        hyperlinks = False
+        while self._peek() == 'L_CURLY_BRACKET':
+            self._text()
+            hyperlinks = True
+
+        return hyperlinks
+
+    def _text(self):
+        self._next('L_CURLY_BRACKET')
+        children = []
+        hyperlinks = False
+        while True:
+            self._next('SLASH')
+            child, _hyperlinks = self._bracket(_CLOSED)
+            children.append(child)
+            hyperlinks = self._text_list() or _hyperlinks or hyperlinks
+            self._next('SLASH')
+
+            if self._peek() != 'SLASH':
+                break
+
+        self._next('R_CURLY_BRACKET')
+        text = Text(children)
+        if hyperlinks:
+            raise NotImplementedError("Ieml doesn't support hypertext parsing for the moment.")
+
+        return text
 
-def _hyperlink(node, text_list):
-    return node[0], node[1] + [(text, [node[0]]) for text in text_list[0]]
+
+class ParseCache:
+    """
+    LRU cache of the parsed syntax trees, keyed by (string, dictionary version). The memory limit is on an estimate of
+    the cached entries: the size of the string plus NODE_MEMORY per node of the tree. The trees are interned and share
+    their nodes, so this is an upper bound of the memory they keep alive.
+    """
+    def __init__(self, max_size=PARSE_CACHE_SIZE, max_memory=PARSE_CACHE_MEMORY):
+        self.max_size = max_size
+        self.max_memory = max_memory
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self._entries = OrderedDict()
+            self.memory = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def get(self, s, version):
+        """The cached tree, None if not in cache"""
+        key = (s, version)
+        with self.lock:
+            try:
+                result, _ = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, s, version, result):
+        key = (s, version)
+        with self.lock:
+            if self.max_size <= 0 or key in self._entries:
+                return
+
+            memory = self.entry_memory(s, result)
+            self._entries[key] = (result, memory)
+            self.memory += memory
+
+            while len(self._entries) > self.max_size or (self.memory > self.max_memory and len(self._entries) > 1):
+                _, (_, _memory) = self._entries.popitem(last=False)
+                self.memory -= _memory
+                self.evictions += 1
+
+    def invalidate(self, version=None):
+        """Remove the trees of the dictionary version (str), all the trees if None"""
+        with self.lock:
+            for key in [k for k in self._entries if version is None or k[1] == version]:
+                _, memory = self._entries.pop(key)
+                self.memory -= memory
+
+    @staticmethod
+    def entry_memory(s, tree):
+        """The estimated memory of a cached tree and its string, in bytes"""
+        return sys.getsizeof(s) + NODE_MEMORY * sum(1 for _ in tree.tree_iter())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'memory': self.memory,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'max_size': self.max_size,
+            'max_memory': self.max_memory
+        }
 
 
 class IEMLParserSingleton(type):
@@ -48,8 +295,9 @@ class IEMLParserSingleton(type):
         if not isinstance(dictionary, Dictionary):
             dictionary = Dictionary(dictionary)
 
-        if dictionary.version not in cls._instances:
-            # this code is to clean up duplicate class if we reload modules
+        if dictionary.version not in cls._instances or cls._instances[dictionary.version].dictionary is not dictionary:
+            # new or reloaded dictionary, the cached trees have the terms of the previous one
+            cls.cache.invalidate(str(dictionary.version))
             cls._instances[dictionary.version] = \
                 super(IEMLParserSingleton, cls).__call__(dictionary=dictionary)
 
@@ -57,185 +305,27 @@ class IEMLParserSingleton(type):
 
 
 class IEMLParser(metaclass=IEMLParserSingleton):
-    tokens = tokens
-    lock = threading.Lock()
+    # the parsed trees of all the dictionary versions
+    cache = ParseCache()
 
     def __init__(self, dictionary=None):
-
+        self.dictionary = dictionary
+        self._version = str(dictionary.version)
         self._get_term = partial(term, dictionary=dictionary)
 
-        # Build the lexer and parser
-        self.lexer = get_lexer()
-        self.parser = yacc.yacc(module=self, errorlog=logging, start='proposition',
-                                debug=False, optimize=True, picklefile=os.path.join(parser_folder, "ieml_parser.pickle"))
-        self._ieml = None
-
     def parse(self, s):
         """Parses the input string, and returns a reference to the created AST's root"""
-        # self._ieml = s
-        # self.root = None
-        # self.hyperlinks = []
-        with self.lock:
-            try:
-                return self.parser.parse(s, lexer=self.lexer)
-            except InvalidIEMLObjectArgument as e:
-                raise CannotParse(s, str(e))
-            except CannotParse as e:
-                e.s = s
-                raise e
-
-            # if self.root is not None:
-        #     if self.hyperlinks:
-        #         self.root = Hypertext(self.hyperlinks)
-        #
-        #     # if isinstance(self.root, Term):
-        #     #     self.root = Word(root=Morpheme([self.root]))
-        #
-        #     return self.root
-        # else:
-        #     raise CannotParse(s, "Invalid ieml object.")
-
-    # Parsing rules
-    def p_ieml_proposition(self, p):
-        """proposition : script
-                        | term
-                        | morpheme
-                        | word
-                        | clause
-                        | sentence
-                        | superclause
-                        | supersentence
-                        | text"""
-        if isinstance(p[1], Term):
-            # script rule
-            p[0] = SyntaxTerm(p[1])
-        else:
-            p[0] = p[1][0]
-
-    def p_literal_list(self, p):
-        """literal_list : literal_list LITERAL
-                        | LITERAL"""
-
-        if len(p) == 3:
-            p[0] = p[1] + [p[2][1:-1]]
-        else:
-            p[0] = [p[1][1:-1]]
+        result = self.cache.get(s, self._version)
+        if result is not None:
+            return result
 
-
-    def p_script(self, p):
-        """script : TERM """
         try:
-            p[0] = self._get_term(p[1])
-        except TermNotFoundInDictionary as e:
-            raise CannotParse(self._ieml, str(e))
-
-    def p_term(self, p):
-        """term : LBRACKET script RBRACKET
-                | LBRACKET script RBRACKET literal_list"""
-        if len(p) == 4:
-            p[0] = _build(SyntaxTerm(p[2]))
-        else:
-            p[0] = _build(SyntaxTerm(p[2], literals=p[4]))
-
-
-    def p_proposition_sum(self, p):
-        """terms_sum : terms_sum PLUS term
-                    | term
-            clauses_sum : clauses_sum PLUS clause
-                    | clause
-            superclauses_sum : superclauses_sum PLUS superclause
-                    | superclause
-            closed_proposition_list : closed_proposition_list closed_proposition
-                                    | closed_proposition"""
-        if len(p) == 4:
-            p[0] = _add(p[1], p[3])
-        elif len(p) == 3:
-            p[0] = _add(p[1], p[2])
-        else:
-            p[0] = _add(([], []), p[1])
-
-    def p_morpheme(self, p):
-        """morpheme : LPAREN terms_sum RPAREN"""
-        p[0] = _build(Morpheme(p[2][0]), p[2])
-
-    def p_word(self, p):
-        """word : LBRACKET morpheme RBRACKET
-                | LBRACKET morpheme RBRACKET literal_list
-                | LBRACKET morpheme TIMES morpheme RBRACKET
-                | LBRACKET morpheme TIMES morpheme RBRACKET literal_list"""
-
-        if len(p) == 4:
-            p[0] = _build(Word(root=p[2][0]), p[2])
-        elif len(p) == 5:
-            p[0] = _build(Word(root=p[2][0], literals=p[4]), p[2])
-        elif len(p) == 6:
-            p[0] = _build(Word(root=p[2][0], flexing=p[4][0]), p[2], p[4])
-        else:
-            p[0] = _build(Word(root=p[2][0], flexing=p[4][0], literals=p[6]), p[2], p[4])
-
-    def p_decorated(self, p):
-        """decorated_word : word
-                           | word text_list
-            decorated_sentence : sentence
-                                | sentence text_list
-            decorated_supersentence : supersentence
-                                    | supersentence text_list"""
-        if len(p) == 2:
-            p[0] = p[1]
-        else:
-            p[0] = _hyperlink(p[1], p[2])
-
-    def p_clause(self, p):
-        """clause : LPAREN decorated_word TIMES decorated_word TIMES decorated_word RPAREN"""
-        p[0] = _build(Clause(substance=p[2][0], attribute=p[4][0], mode=p[6][0]), p[2], p[4], p[6])
-
-    def p_sentence(self, p):
-        """sentence : LBRACKET clauses_sum RBRACKET
-                    | LBRACKET clauses_sum RBRACKET literal_list"""
-        if len(p) == 4:
-            p[0] = _build(Sentence(p[2][0]), p[2])
-        else:
-            p[0] = _build(Sentence(p[2][0], literals=p[4]), p[2])
-
-    def p_superclause(self, p):
-        """superclause : LPAREN decorated_sentence TIMES decorated_sentence TIMES decorated_sentence RPAREN"""
-        p[0] = _build(SuperClause(substance=p[2][0], attribute=p[4][0], mode=p[6][0]), p[2], p[4], p[6])
-
-    def p_super_sentence(self, p):
-        """supersentence : LBRACKET superclauses_sum RBRACKET
-                         | LBRACKET superclauses_sum RBRACKET literal_list"""
-        if len(p) == 4:
-            p[0] = _build(SuperSentence(p[2][0]), p[2])
-        else:
-            p[0] = _build(SuperSentence(p[2][0], literals=p[4]), p[2])
-
-    def p_closed_proposition(self, p):
-        """ closed_proposition : SLASH decorated_word SLASH
-                               | SLASH decorated_sentence SLASH
-                               | SLASH decorated_supersentence SLASH"""
-        p[0] = p[2]
-
-    def p_text(self, p):
-        """text : L_CURLY_BRACKET closed_proposition_list R_CURLY_BRACKET"""
-        p[0] = _build(Text(p[2][0]))
-
-        if p[2][1]:
-            raise NotImplementedError("Ieml doesn't support hypertext parsing for the moment.")
-            # tuple of the hyperlink (end text, path)
-            # self.hyperlinks += [Hyperlink(p[0][0], e[0], PropositionPath(e[1])) for e in p[2][1]]
-
-    def p_text_list(self, p):
-        """text_list : text_list text
-                    | text"""
-        if len(p) == 3:
-            p[0] = _add(p[1], p[2])
-        else:
-            p[0] = _add(([], []), p[1])
-
-    def p_error(self, p):
-        if p:
-            msg = "Syntax error at '%s' (%d, %d)" % (p.value, p.lineno, p.lexpos)
-        else:
-            msg = "Syntax error at EOF"
-
-        raise CannotParse(None, msg)
+            result = _Parsing(s, self._get_term).proposition()
+        except InvalidIEMLObjectArgument as e:
+            raise CannotParse(s, str(e))
+        except CannotParse as e:
+            e.s = s
+            raise e
+
+        self.cache.put(s, self._version, result)
+        return result
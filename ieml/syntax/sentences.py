@@ -1,4 +1,4 @@
-from .commons import IEMLSyntax
+from .commons import IEMLSyntax, sort_key
 from ..constants import MAX_NODES_IN_SENTENCE
 from ..exceptions import InvalidIEMLObjectArgument, InvalidTreeStructure
 from .words import Word
@@ -51,6 +51,9 @@ class AbstractClause(IEMLSyntax):
 class AbstractSentence(IEMLSyntax):
     closable = True
 
+    # None until the first use for the trusted construction
+    _tree_graph = None
+
     def __init__(self, subtype, children, literals=None):
         try:
             _children = tuple(e for e in children)
@@ -62,7 +65,7 @@ class AbstractSentence(IEMLSyntax):
                                             (self.__class__.__name__, subtype.__name__))
 
         try:
-            self.tree_graph = TreeGraph(_children)
+            self._tree_graph = TreeGraph(_children)
         except InvalidTreeStructure as e:
             raise InvalidIEMLObjectArgument(self.__class__, e)
 
@@ -71,9 +74,20 @@ class AbstractSentence(IEMLSyntax):
                                             (len(self.tree_graph.nodes), MAX_NODES_IN_SENTENCE))
 
         super().__init__((e for stage in self.tree_graph.stages
-                          for e in sorted((t[1] for s in stage for t in self.tree_graph.transitions[s]))),
+                          for e in sorted((t[1] for s in stage for t in self.tree_graph.transitions[s]), key=sort_key)),
                          literals=literals)
 
+    def _init_validated(self):
+        # the clauses are a valid tree, its graph is built without the checks on first use
+        self._tree_graph = None
+
+    @property
+    def tree_graph(self):
+        if self._tree_graph is None:
+            self._tree_graph = TreeGraph(self.children, validate=False)
+
+        return self._tree_graph
+
     @property
     def grammatical_class(self):
         return self.tree_graph.root.grammatical_class
@@ -1,6 +1,5 @@
-from ieml.commons import TreeStructure
 from ieml.dictionary.dictionary import Dictionary
-from ieml.syntax.commons import IEMLSyntax
+from ieml.syntax.commons import IEMLSyntax, _INTERNED
 
 
 class SyntaxTerm(IEMLSyntax):
@@ -18,7 +17,12 @@ class SyntaxTerm(IEMLSyntax):
 
         super().__init__(children=(), literals=literals)
 
-    __hash__ = TreeStructure.__hash__
+    def __hash__(self):
+        # the terms are equal on their index whatever their literals, the literals are left out of the hash
+        return hash(self.term)
+
+    def _merkle_data(self):
+        return '\x00'.join((str(self.term.script),) + self.literals).encode()
 
     def __str__(self):
         return self.term.__str__()
@@ -26,9 +30,34 @@ class SyntaxTerm(IEMLSyntax):
     def compute_str(self, children_str):
         return str(self)
 
-    def set_dictionary_version(self, version):
-        self._str = None
-        self.term = Dictionary(version).translate_script_from_version(self.term.dictionary.version, self.term.script)
+    @classmethod
+    def _from_validated(cls, term, literals=()):
+        literals = tuple(literals)
+        node = _INTERNED.get((cls, id(term), literals))
+        if node is not None:
+            return node
+
+        node = cls.__new__(cls)
+        node.term = term
+        node.dictionary_version = term.dictionary.version
+        node._set_validated((), literals)
+        return node._intern()
+
+    def _intern_key(self):
+        # the terms are unique in their dictionary
+        return self.__class__, id(self.term), self.literals
+
+    def _translate_term(self, version):
+        return Dictionary(version).translate_script_from_version(self.term.dictionary.version, self.term.script)
+
+    def _translated(self, version):
+        if self.dictionary_version == version:
+            return self
+
+        return SyntaxTerm(self._translate_term(version), literals=self.literals)
+
+    def _compute_sort_key(self):
+        return self.__class__.syntax_rank(), self.term.index
 
     def __getattr__(self, item):
         if item not in self.__dict__:
@@ -37,9 +66,3 @@ class SyntaxTerm(IEMLSyntax):
     def __eq__(self, other):
         return isinstance(other, self.__class__) and self.index == other.index
 
-    def __gt__(self, other):
-        if self.__class__ != other.__class__:
-            return self.__class__ > other.__class__
-
-        return self.index > other.index
-
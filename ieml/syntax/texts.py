@@ -1,6 +1,6 @@
 from itertools import chain
 
-from .commons import IEMLSyntax
+from .commons import IEMLSyntax, sort_key
 from ..exceptions import InvalidIEMLObjectArgument
 from .sentences import Sentence, SuperSentence
 from .words import Word, Morpheme
@@ -24,7 +24,7 @@ class Text(IEMLSyntax):
         _children = list(chain([c for c in _children if not isinstance(c, Text)],
                          *(c.children for c in _children if isinstance(c, Text))))
 
-        super().__init__(sorted(set(_children)))
+        super().__init__(sorted(set(_children), key=sort_key))
 
     def compute_str(self, children_str):
         return '{/' + '//'.join(children_str) + '/}'
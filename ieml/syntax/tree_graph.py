@@ -1,14 +1,16 @@
 from collections import defaultdict
 import numpy
 
+from ..commons import cached_property
 from ..exceptions import InvalidTreeStructure
 
 
 class TreeGraph:
-    def __init__(self, list_transitions):
+    def __init__(self, list_transitions, validate=True):
         """
         Transitions list must be the (start, end, data) the data will be stored as the transition tag
         :param list_transitions:
+        :param validate: if False, the transitions are trusted to be a tree and the structure is not checked
         """
         # transitions : dict
         #
@@ -17,39 +19,83 @@ class TreeGraph:
             self.transitions[t[0]].append((t[1], t))
 
         self.nodes = sorted(set(self.transitions) | {e[0] for l in self.transitions.values() for e in l})
+        self.nodes_index = {n: i for i, n in enumerate(self.nodes)}
 
         # sort the transitions
         for s in self.transitions:
-            self.transitions[s].sort(key=lambda t: self.nodes.index(t[0]))
-
-        self.nodes_index = {n: i for i, n in enumerate(self.nodes)}
-        _count = len(self.nodes)
-        self.array = numpy.zeros((len(self.nodes), len(self.nodes)), dtype=bool)
-
-        for t in self.transitions:
-            for end in self.transitions[t]:
-                self.array[self.nodes_index[t]][self.nodes_index[end[0]]] = True
+            self.transitions[s].sort(key=lambda t: self.nodes_index[t[0]])
 
         # checking
-        # root checking, no_parent hold True for each index where the node has no parent
-        parents_count = numpy.dot(self.array.transpose().astype(dtype=int), numpy.ones((_count,), dtype=int))
-        no_parents = parents_count == 0
-        roots_count = numpy.count_nonzero(no_parents)
+        # parents[i] is the index of the parent of the node i, -1 for a node without parent, multiple transitions
+        # between the same nodes count as a single parent
+        self.parents = [-1] * len(self.nodes)
+        several_parents = False
+        for s, children in self.transitions.items():
+            i = self.nodes_index[s]
+            for end, _ in children:
+                j = self.nodes_index[end]
+                if self.parents[j] == -1:
+                    self.parents[j] = i
+                elif self.parents[j] != i:
+                    several_parents = True
+
+        roots = [i for i, p in enumerate(self.parents) if p == -1]
+        if validate:
+            if len(roots) == 0:
+                raise InvalidTreeStructure('No root node found, the graph has at least a cycle.')
+            elif len(roots) > 1:
+                raise InvalidTreeStructure('Several root nodes found.')
 
-        if roots_count == 0:
-            raise InvalidTreeStructure('No root node found, the graph has at least a cycle.')
-        elif roots_count > 1:
-            raise InvalidTreeStructure('Several root nodes found.')
+            if several_parents:
+                raise InvalidTreeStructure('A node has several parents.')
 
-        self.root = self.nodes[no_parents.nonzero()[0][0]]
+        self.root = self.nodes[roots[0]]
 
-        if (parents_count > 1).any():
-            raise InvalidTreeStructure('A node has several parents.')
+        # paths[i] is the tuple of the positions of the transitions from the root to the node i, a transition
+        # position is the index of the end node in the transitions of the start node (first one if repeated)
+        self.paths = [None] * len(self.nodes)
+        self.paths[roots[0]] = ()
 
         def __stage():
             current = [self.root]
             while current:
                 yield current
-                current = [child[0] for parent in current for child in self.transitions[parent]]
+                _next = []
+                for parent in current:
+                    path = self.paths[self.nodes_index[parent]]
+                    for k, (child, _) in enumerate(self.transitions[parent]):
+                        j = self.nodes_index[child]
+                        if self.paths[j] is None:
+                            self.paths[j] = path + (k,)
+                        _next.append(child)
+                current = _next
+
+        self.stages = list(__stage())
+
+        if validate and any(p is None for p in self.paths):
+            raise InvalidTreeStructure('A cycle is not connected to the root node.')
+
+    def parent(self, node):
+        """The parent of the node, None for the root."""
+        i = self.parents[self.nodes_index[node]]
+        return self.nodes[i] if i != -1 else None
+
+    def path(self, node):
+        """The nodes from the root to this node and the positions of the transitions between them."""
+        i = self.nodes_index[node]
+        nodes = [node]
+        while self.parents[i] != -1:
+            i = self.parents[i]
+            nodes.append(self.nodes[i])
+
+        return nodes[::-1], self.paths[self.nodes_index[node]]
+
+    @cached_property
+    def array(self):
+        """The dense adjacency matrix, array[i, j] is True if there is a transition from the node i to the node j"""
+        parents = numpy.array(self.parents, dtype=int)
+        children = numpy.nonzero(parents != -1)[0]
 
-        self.stages = list(__stage())
\ No newline at end of file
+        array = numpy.zeros((len(self.nodes), len(self.nodes)), dtype=bool)
+        array[parents[children], children] = True
+        return array
@@ -1,6 +1,6 @@
 from ieml.dictionary.terms import Term
 from ieml.syntax.terms import SyntaxTerm
-from .commons import IEMLSyntax
+from .commons import IEMLSyntax, sort_key
 from ..exceptions import InvalidIEMLObjectArgument
 from ..constants import MAX_SINGULAR_SEQUENCES, MORPHEME_SIZE_LIMIT
 import numpy
@@ -27,8 +27,10 @@ class Morpheme(IEMLSyntax):
             raise InvalidIEMLObjectArgument(Morpheme, "Singular sequences intersection in %s."%
                                             str([str(t) for t in _children]))
 
-        super().__init__(sorted(_children))
+        super().__init__(sorted(_children, key=sort_key))
+        self._init_validated()
 
+    def _init_validated(self):
         self.cardinal = 1
         for c in self.children:
             self.cardinal *= c.script.cardinal
@@ -66,10 +68,13 @@ class Word(IEMLSyntax):
 
         super().__init__(_children, literals=literals)
 
-        self.cardinal = self.root.cardinal * (self.flexing.cardinal if self.flexing else 1)
+        self._init_validated()
         if self.cardinal > MAX_SINGULAR_SEQUENCES:
             raise InvalidIEMLObjectArgument(Word, "Too many word- singular sequences defined (max: 360) here: %d"%self.cardinal)
 
+    def _init_validated(self):
+        self.cardinal = self.root.cardinal * (self.flexing.cardinal if self.flexing else 1)
+
     @property
     def grammatical_class(self):
         return self.root.grammatical_class
@@ -1,4 +1,7 @@
 import itertools
+import os
+import subprocess
+import sys
 import unittest
 
 import numpy as np
@@ -9,6 +12,9 @@ from ieml.syntax.parser import IEMLParser
 from ieml.syntax.sentences import SuperClause
 from ieml.tools import RandomPoolIEMLObjectGenerator
 from ieml.dictionary.script import script as sc
+from ieml.dictionary import Dictionary
+from ieml.usl import Usl
+from ieml.syntax.commons import _INTERNED
 from ieml.test.helper import *
 
 
@@ -252,4 +258,127 @@ class TestText(unittest.TestCase):
         s = RandomPoolIEMLObjectGenerator(level=Text).text()
         h = {s: 1,
              2:3}
-        self.assertIn(s, h)
\ No newline at end of file
+        self.assertIn(s, h)
+
+
+class TestInterning(unittest.TestCase):
+    def setUp(self):
+        self.terms = [SyntaxTerm(t) for t in Dictionary().index if len(t) == 1][:10]
+
+    def test_identical_nodes(self):
+        a, b, c, d = self.terms[3:7]
+        word = IEMLParser().parse("[(%s+%s)*(%s)]" % (a, b, c))
+
+        self.assertIs(word, IEMLParser().parse(str(word)))
+        self.assertIs(word, Word(Morpheme([b, a]), Morpheme([c])))
+        self.assertIs(word.root, Morpheme([a, b]))
+        self.assertIsNot(word, Word(Morpheme([a, b]), Morpheme([d])))
+        self.assertIsNot(word, Word(Morpheme([a, b]), Morpheme([c]), literals='literal'))
+        self.assertIs(SyntaxTerm(a.term), a)
+
+        text = Text([word, Word.from_term(d.term)])
+        self.assertIs(text, Text([Word.from_term(d.term), Text([word])]))
+        self.assertIs(text._translated(text.dictionary_version), text)
+
+    def test_shared_nodes(self):
+        words = [Word.from_term(t.term) for t in self.terms[3:7]]
+        clauses = [Clause(words[0], words[1], words[2]), Clause(words[0], words[3], words[2])]
+        sentence = Sentence(clauses)
+
+        self.assertIs(sentence, Sentence(reversed(clauses)))
+        self.assertEqual(len({id(w) for c in sentence for w in c}), 4)
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.terms = [SyntaxTerm(t) for t in Dictionary().index if len(t) == 1][:10]
+
+    def test_fingerprint(self):
+        a, b, c, d = self.terms[3:7]
+        word = Word(Morpheme([a, b]), Morpheme([c]))
+        other = Word(Morpheme([a, b]), Morpheme([d]))
+        text = Text([word, other])
+
+        self.assertNotEqual(word.fingerprint(), other.fingerprint())
+        self.assertNotEqual(word.fingerprint(), Word(Morpheme([a, b]), Morpheme([c]), literals='l').fingerprint())
+        self.assertLess(word.fingerprint(), 2 ** 64)
+        self.assertGreaterEqual(word.fingerprint(bits=128), 2 ** 64)
+        self.assertNotEqual(word.fingerprint(dictionary_version=word.dictionary_version), word.fingerprint())
+        self.assertEqual(hash(word), hash(word.fingerprint()))
+        self.assertEqual(Usl(text).fingerprint(bits=128), text.fingerprint(bits=128))
+        with self.assertRaises(ValueError):
+            word.fingerprint(bits=32)
+
+    def test_hash_equality(self):
+        a, b = self.terms[3:5]
+        _a = SyntaxTerm(a.term, literals=['x'])
+        word, _word = Word(Morpheme([a, b])), Word(Morpheme([_a, b]))
+
+        # the terms are equal whatever their literals, the literals of the terms of a word change the word
+        self.assertEqual(a, _a)
+        self.assertEqual(hash(a), hash(_a))
+        self.assertNotEqual(word, _word)
+        self.assertEqual(len({a, _a, word, _word}), 3)
+        self.assertEqual(word, str(word))
+        self.assertNotEqual(word, str(_word))
+
+        _INTERNED.clear()
+        for node in (a, _a, word, _word):
+            other = SyntaxTerm(node.term, literals=node.literals) if isinstance(node, SyntaxTerm) else \
+                Word(Morpheme([SyntaxTerm(t.term, literals=t.literals) for t in node.root]))
+            self.assertIsNot(other, node)
+            self.assertEqual(other, node)
+            self.assertEqual(hash(other), hash(node))
+            self.assertIn(other, {node})
+
+    def test_stable_across_processes(self):
+        text = Text([Word.from_term(t.term) for t in self.terms[3:7]])
+        code = "from ieml.tools import ieml; print(ieml(%r).fingerprint(bits=128))" % str(text)
+        out = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, check=True,
+                             env=dict(os.environ, PYTHONHASHSEED='12345'))
+        self.assertEqual(int(out.stdout.decode().split()[-1]), text.fingerprint(bits=128))
+
+
+class TestSortKey(unittest.TestCase):
+    def test_order(self):
+        a, b, c, d = [SyntaxTerm(t) for t in Dictionary().index if len(t) == 1][3:7]
+        w0, w1 = Word(Morpheme([a])), Word(Morpheme([a]), Morpheme([b]))
+        w2 = Word(Morpheme([a, c]))
+
+        self.assertLess(a, b)
+        self.assertLess(b, w0)
+        self.assertListEqual(sorted([w2, w1, w0]), [w0, w1, w2])
+        self.assertListEqual(list(Morpheme([d, b, c])), [b, c, d])
+        self.assertLess(w2, Sentence([Clause(w0, w1, w2)]))
+        self.assertTupleEqual(w0.sort_key, (Word.syntax_rank(), (w0.root.sort_key,)))
+
+
+class TestTrustedConstruction(unittest.TestCase):
+    def test_from_validated(self):
+        a, b, c, d = [SyntaxTerm(t) for t in Dictionary().index if len(t) == 1][3:7]
+        w0, w1, w2 = Word(Morpheme([a, b]), Morpheme([c])), Word(Morpheme([c])), Word(Morpheme([d]), literals='l')
+        sentence = Sentence([Clause(w0, w1, w2), Clause(w0, w2, w1)])
+        text = Text([sentence, w2])
+
+        def rebuild(node):
+            if isinstance(node, SyntaxTerm):
+                return SyntaxTerm._from_validated(node.term, node.literals)
+            return node.__class__._from_validated([rebuild(c) for c in node.children], node.literals)
+
+        self.assertIs(rebuild(text), text)
+
+        _INTERNED.clear()
+        _text = rebuild(text)
+        self.assertIsNot(_text, text)
+        self.assertIs(Text(_text.children), _text)
+        for node, _node in zip(text.tree_iter(), _text.tree_iter()):
+            self.assertIs(node.__class__, _node.__class__)
+            self.assertEqual(str(node), str(_node))
+            self.assertEqual(node.sort_key, _node.sort_key)
+            self.assertEqual(node.fingerprint(), _node.fingerprint())
+            if isinstance(node, (Morpheme, Word)):
+                self.assertEqual(node.cardinal, _node.cardinal)
+
+        # the tree graph of the trusted sentence is built on first use
+        self.assertIsNone(_text.children[1]._tree_graph)
+        self.assertListEqual(_text.children[1].tree_graph.stages, [[w0], [w1, w2]])
@@ -17,7 +17,7 @@ class TestTreeStructure(TestCase):
     def test_equal(self):
         t = RandomPoolIEMLObjectGenerator(level=Text).text()
         t2 = Text(children=t.children)
-        self.assertNotEqual(id(t), id(t2))
+        self.assertIs(t, t2)
         self.assertEqual(t, t2)
 
         self.assertEqual(t, str(t))
@@ -125,6 +125,6 @@ class TestVersioning(TestCase):
 
         v = create_dictionary_version(update=update)
         p = ieml("[([n.-S:.U:.-'T:.-'T:.-',M:.-',S:.-',_])]")
-        p.set_dictionary_version(v)
+        p = ieml(p, dictionary_version=v)
 
         self.assertEqual(str(p), "[([n.-S:.U:.-'T:.-'T:.-',S:.-',M:.-',_])]")
\ No newline at end of file
@@ -1,7 +1,13 @@
 import os
+import pickle
+from unittest import mock
+
+import numpy as np
 
 from ieml.constants import LANGUAGES, MAX_LAYER
 from ieml.dictionary import Dictionary
+from ieml.dictionary.table import Table1D, Table2D
+from ieml.dictionary.version import load_dictionary_from_cache, save_dictionary_to_cache, create_dictionary_version
 
 from unittest.case import TestCase
 
@@ -27,4 +33,69 @@ class DictionaryTest(TestCase):
         self.assertEqual(d0, d1)
 
         d2 = Dictionary('dictionary_2017-06-07_00:00:00')
-        self.assertNotEqual(d0, d2)
\ No newline at end of file
+        self.assertNotEqual(d0, d2)
+
+    def test_tables_index(self):
+        dic = Dictionary()
+        for t in dic:
+            if not isinstance(t, (Table1D, Table2D)):
+                continue
+
+            for coords, c in np.ndenumerate(t.cells):
+                self.assertTupleEqual(t.index_of(c.script), coords)
+                self.assertIn(t.index, dic.tables_index.tables_of(c.index))
+                self.assertEqual(dic.tables_index.root_of(c.index), t.root.index)
+
+    def test_tables_layout(self):
+        dic = Dictionary()
+        for root in dic.roots:
+            tables = dic.tables_layout(root)
+            self.assertEqual(len(tables), len(root.script.cells))
+            for table, cells in zip(tables, root.script.cells):
+                self.assertTupleEqual(table['cells'].shape, cells.shape)
+                self.assertTupleEqual(table['rows'].shape, (cells.shape[2], cells.shape[0]))
+                self.assertTupleEqual(table['columns'].shape, (cells.shape[2], cells.shape[1]))
+
+        for t in dic:
+            if isinstance(t, Table2D):
+                self.assertListEqual([r.index if r is not None else -1 for r in t.rows],
+                                     dic.tables_layout(t)[0]['rows'][0].tolist())
+
+    def test_stale_cache(self):
+        dic = Dictionary()
+        save_dictionary_to_cache(dic)
+        self.assertEqual(len(load_dictionary_from_cache(dic.version)), len(dic))
+
+        try:
+            # a cache of another layout is ignored
+            with open(dic.version.cache, 'wb') as fp:
+                pickle.dump(dic, fp, protocol=4)
+            self.assertIsNone(load_dictionary_from_cache(dic.version))
+
+            with open(dic.version.cache, 'wb') as fp:
+                fp.write(b'invalid')
+            self.assertIsNone(load_dictionary_from_cache(dic.version))
+        finally:
+            save_dictionary_to_cache(dic)
+
+    def test_translations_version(self):
+        dic = Dictionary()
+        term = dic.index[10]
+        update = {'translations': {l: {str(term.script): 'new translation'} for l in LANGUAGES}}
+
+        # a version that only changes the translations reuses the relations and the tables of its parent
+        with mock.patch('ieml.dictionary.version.latest_dictionary_version', return_value=dic.version):
+            version = create_dictionary_version(old_version=dic.version, update=update)
+
+        try:
+            _dic = Dictionary(version)
+            self.assertEqual(len(_dic), len(dic))
+            self.assertListEqual(_dic.tables_index.root.tolist(), dic.tables_index.root.tolist())
+            self.assertEqual(_dic.translations['fr'][str(term.script)], 'new translation')
+
+            root = next(iter(dic.roots))
+            self.assertListEqual(_dic.tables_layout(root)[0]['tabs'].tolist(),
+                                 dic.tables_layout(root)[0]['tabs'].tolist())
+        finally:
+            if os.path.isfile(version.cache):
+                os.remove(version.cache)
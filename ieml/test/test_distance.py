@@ -0,0 +1,128 @@
+import glob
+import os
+import unittest
+
+import numpy as np
+
+from ieml.dictionary import Dictionary
+from ieml.dictionary.distance import _build_distance_matrix, RELATIONS_TYPES, RelationType, get_relation, \
+    get_relation_value, get_matrix, top_k, term_ranking, default_metric, NULL_DISTANCE, _MATRICES, _matrix_files, \
+    _save_matrix, _load_matrix
+
+
+def _reference_matrices(d):
+    """The relation and order matrices entries built term by term."""
+    def _enumerate_ancestors(t, prefix='', seen=None):
+        if seen is None:
+            seen = set()
+        for k, v in t.relations.father.items():
+            for t1 in v:
+                if t1.layer == 0 and len(prefix) != 0:
+                    continue
+
+                if t1 not in seen:
+                    yield (prefix + k, t1)
+                    seen.add(t1)
+
+                if len(prefix) < 2:
+                    yield from _enumerate_ancestors(t1, prefix=prefix + k, seen=seen)
+
+    relation, order = {}, {}
+    for root in d.roots:
+        past = set()
+        for t0 in root.relations.contains:
+            past.add(t0)
+            seen = set(past)
+            for rel_graph, rel_type in RELATIONS_TYPES:
+                for t1 in set(t0.relations[rel_graph]).difference(seen):
+                    for key in ((t0.index, t1.index), (t1.index, t0.index)):
+                        relation[key] = int(rel_type)
+                        order[key] = get_relation_value(rel_type, t0)
+                    seen.add(t1)
+
+    for t0 in d:
+        for prefix, t1 in _enumerate_ancestors(t0):
+            for t_0, t_1 in ((t0, t1), (t1, t0)):
+                rel = get_relation(t_0, t_1, prefix=prefix)
+                relation[(t_0.index, t_1.index)] = int(rel)
+                order[(t_0.index, t_1.index)] = get_relation_value(rel, t_0)
+
+        relation[(t0.index, t0.index)] = int(RelationType.Equal)
+        order[(t0.index, t0.index)] = 0
+
+    return relation, order
+
+
+class TestDistance(unittest.TestCase):
+    def test_build_matrices(self):
+        d = Dictionary()
+        mat = _build_distance_matrix(d.version)
+
+        for name, expected in zip(('relation', 'order'), _reference_matrices(d)):
+            coo = mat[name].tocoo()
+            self.assertDictEqual({(int(i), int(j)): int(v) for i, j, v in zip(coo.row, coo.col, coo.data)}, expected)
+
+    def test_save_mapped_matrix(self):
+        d = Dictionary()
+        mat = get_matrix('order', d.version)
+        files = _matrix_files('order', d.version)
+        expected = mat.toarray()
+
+        # the cache files are replaced, the mapped arrays of the previous files are still valid
+        mapped = _load_matrix('order', d.version)
+        inode = os.stat(files['data']).st_ino
+        _save_matrix('order', d.version, mat.copy())
+
+        self.assertNotEqual(os.stat(files['data']).st_ino, inode)
+        self.assertTrue(np.array_equal(mapped.toarray(), expected))
+        self.assertTrue(np.array_equal(_load_matrix('order', d.version).toarray(), expected))
+        self.assertListEqual(glob.glob(os.path.join(os.path.dirname(files['data']), '*.npy.tmp')), [])
+
+    def test_top_k(self):
+        d = Dictionary()
+        order = get_matrix('order', d.version)
+
+        for t in d.index[::11]:
+            row = order[t.index, :]
+            expected = [i for _, i in sorted(zip(row.data, row.indices))]
+            ss, paradigms = term_ranking(t)
+
+            self.assertListEqual([x.index for x in ss], [i for i in expected if len(d.index[i]) == 1])
+            self.assertListEqual([x.index for x in paradigms], [i for i in expected if len(d.index[i]) != 1])
+            self.assertListEqual(list(top_k(t, 5)), expected[:5])
+            self.assertListEqual(list(top_k(t.index, 5, singular_only=True)), [x.index for x in ss[:5]])
+
+        indices = [t.index for t in d.index[:20]]
+        res = top_k(indices, 1000, singular_only=True)
+        self.assertTupleEqual(res.shape, (20, 1000))
+        for i, r in zip(indices, res):
+            self.assertListEqual(list(r[r != -1]), list(top_k(i, 1000, singular_only=True)))
+
+    def test_default_metric(self):
+        d = Dictionary()
+        for name in ('relation', 'order', 'distance'):
+            self.assertEqual(get_matrix(name, d.version).dtype, np.uint8)
+
+        # reloaded from the files
+        _MATRICES.clear()
+        distance = get_matrix('distance', d.version)
+        for array in (distance.data, distance.indices, distance.indptr):
+            while not isinstance(array, np.memmap) and array is not None:
+                array = array.base
+            self.assertIsInstance(array, np.memmap)
+
+        order = get_matrix('order', d.version).toarray()
+        expected = np.where(order + order.T != 0, np.maximum(order, order.T), NULL_DISTANCE)
+        np.fill_diagonal(expected, 0)
+
+        metric = default_metric(d.version)
+        for t in d.index[::13]:
+            self.assertEqual(metric(t, t), 0)
+            for t1 in d.index[::17]:
+                self.assertEqual(metric(t, t1), expected[t.index, t1.index])
+                self.assertEqual(metric(t, t1), metric(t1, t))
+
+        i, j = np.meshgrid(np.arange(len(d)), np.arange(0, len(d), 29))
+        res = metric(i, j)
+        self.assertEqual(res.dtype, np.uint8)
+        self.assertTrue(np.array_equal(res, expected[i, j]))
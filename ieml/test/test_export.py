@@ -0,0 +1,57 @@
+import csv
+import gc
+import json
+import os
+import pickle
+import tempfile
+import unittest
+import weakref
+
+from ieml.dictionary import Dictionary
+from ieml.dictionary.export import export, terms_ids, stable_id
+from ieml.dictionary.relations import RELATIONS
+
+
+class TestExport(unittest.TestCase):
+    def test_ids(self):
+        d = Dictionary()
+        ids = terms_ids(d)
+        self.assertEqual(len(set(ids)), len(d))
+        self.assertEqual(ids[d.index[0].index], stable_id(str(d.index[0].script)))
+
+    def test_ids_cache(self):
+        d = Dictionary()
+        ids = terms_ids(d)
+
+        # the ids are cached by version, the cache doesn't keep the dictionaries alive
+        other = pickle.loads(pickle.dumps(d, protocol=4))
+        self.assertIs(terms_ids(other), ids)
+
+        ref = weakref.ref(other)
+        del other
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_export(self):
+        d = Dictionary()
+        ids = terms_ids(d)
+        expected = {(int(ids[t0.index]), int(ids[t1.index]), r)
+                    for t0 in d for t1, rels in t0.relations.neighbours.items() for r in rels if r != 'contains'}
+
+        with tempfile.TemporaryDirectory() as directory:
+            nodes, edges = export(d, directory, format='csv', types=[r for r in RELATIONS if r != 'contains'],
+                                  chunksize=7)
+            with open(nodes) as fp:
+                self.assertEqual(len(list(csv.DictReader(fp))), len(d))
+
+            with open(edges) as fp:
+                res = {(int(r['src']), int(r['dst']), r['relation']) for r in csv.DictReader(fp)}
+            self.assertSetEqual(res, expected)
+
+            nodes, edges = export(d, directory, format='ndjson')
+            with open(nodes) as fp:
+                self.assertListEqual([json.loads(l)['IEML'] for l in fp], [str(t.script) for t in d])
+            self.assertTrue(os.path.isfile(edges))
+
+        with self.assertRaises(ValueError):
+            export(d, directory, format='xml')
@@ -1,13 +1,17 @@
+import re
+import sys
 from multiprocessing.dummy import Pool as ThreadPool
 import unittest
 from ieml.dictionary.dictionary import Dictionary
 from ieml.dictionary.script.operator import script
 
 from ieml.exceptions import TermNotFoundInDictionary, CannotParse
-from ieml.syntax.parser.parser import IEMLParser
-from ieml.syntax import Text
+from ieml.syntax.parser.parser import IEMLParser, PARSE_CACHE_SIZE, PARSE_CACHE_MEMORY, NODE_MEMORY
+from ieml.syntax import Text, Morpheme, Word, Clause, Sentence, SuperClause, SuperSentence
+from ieml.syntax.parser.lexer import tokenize
 from ieml.syntax.terms import SyntaxTerm
-from ieml.tools import RandomPoolIEMLObjectGenerator, ieml
+from ieml.tools import RandomPoolIEMLObjectGenerator, ieml, parse_many
+from ieml.syntax.codec import decode
 from ieml.dictionary import term
 
 
@@ -87,3 +91,147 @@ class TestPropositionParser(unittest.TestCase):
         results = pool.map(script, Dictionary().version.terms)
         self.assertSetEqual({str(t) for t in results}, set(Dictionary().version.terms))
 
+
+
+class TestGrammar(unittest.TestCase):
+    def setUp(self):
+        self.parser = IEMLParser()
+        self.parser.cache.clear()
+        self.parser.cache.max_size = 0
+        self.terms = [SyntaxTerm(t) for t in Dictionary().index if len(t) == 1][3:12]
+
+        t = self.terms
+        self.words = [Word(Morpheme(t[0:2]), Morpheme(t[2:3])), Word(Morpheme(t[3:4])),
+                      Word(Morpheme(t[4:6]), Morpheme(t[6:8]), literals=['w']), Word(Morpheme(t[8:9]))]
+        w = self.words
+        self.sentences = [Sentence([Clause(w[0], w[1], w[2]), Clause(w[0], w[3], w[2])]),
+                          Sentence([Clause(w[1], w[2], w[3])], literals=['s', 'a\\>b']),
+                          Sentence([Clause(w[3], w[0], w[1])])]
+        s = self.sentences
+        self.super_sentence = SuperSentence([SuperClause(s[0], s[1], s[2])])
+
+    def tearDown(self):
+        self.parser.cache.max_size = PARSE_CACHE_SIZE
+        self.parser.cache.clear()
+
+    def test_parse(self):
+        nodes = [self.terms[0], Morpheme(self.terms[:3])] + self.words + \
+                [self.sentences[0][0], self.sentences[0], self.super_sentence[0], self.super_sentence,
+                 Text(self.words[:2] + self.sentences[1:] + [self.super_sentence])]
+
+        for node in nodes:
+            self.assertIs(self.parser.parse(str(node)), node)
+            # the blanks are ignored
+            self.assertIs(self.parser.parse(re.sub(r'([\[\](){}*+/])', ' \\1\n', str(node))), node)
+
+        self.assertIs(self.parser.parse(str(self.terms[0].term)), self.terms[0])
+        self.assertIs(self.parser.parse(str(self.terms[0]) + '<a><b>'),
+                      SyntaxTerm(self.terms[0].term, literals=['a', 'b']))
+
+    def test_tokenize(self):
+        self.assertListEqual(tokenize("[(E:.- + E:)]<a\\>b> /"),
+                             [('LBRACKET', '[', 0), ('LPAREN', '(', 1), ('TERM', 'E:.-', 2), ('PLUS', '+', 7),
+                              ('TERM', 'E:', 9), ('RPAREN', ')', 11), ('RBRACKET', ']', 12),
+                              ('LITERAL', '<a\\>b>', 13), ('SLASH', '/', 20)])
+
+    def test_syntax_errors(self):
+        word, sentence = str(self.words[1]), str(self.sentences[2])
+        term = str(self.terms[0])
+        for s, msg in (('', "Syntax error at EOF"),
+                       (word + '+', "Syntax error at '+' (1, %d)" % len(word)),
+                       ('[(%s*%s)]' % (word, word), "Syntax error at ')' (1, %d)" % (2 * len(word) + 3)),
+                       ('[(%s*%s*%s)' % (word, word, sentence), "Syntax error at '(' (1, %d)" % (2 * len(word) + 7)),
+                       ('{/%s/}' % term, "Syntax error at '%s' (1, 3)" % term[1:-1]),
+                       ('[(%s)*(%s)' % (term, term), "Syntax error at EOF"),
+                       ('[(invalid)]', "Syntax error at 'in' (1, 2)"),
+                       ('[E:A:T:.]', "Cannot find term E:A:T:. in the dictionary")):
+            with self.assertRaises(CannotParse) as e:
+                self.parser.parse(s)
+            self.assertEqual(e.exception.s, s)
+            self.assertTrue(e.exception.msg.startswith(msg), e.exception.msg)
+
+    def test_hyperlinks(self):
+        text = str(Text(self.words[:2]))
+        with self.assertRaises(NotImplementedError):
+            self.parser.parse('{/%s%s/}' % (str(self.words[0]), text))
+
+        with self.assertRaises(CannotParse):
+            self.parser.parse(str(self.words[0]) + text)
+
+
+class TestParseMany(unittest.TestCase):
+    def test_parse_many(self):
+        terms = [SyntaxTerm(t) for t in Dictionary().index if len(t) == 1][3:9]
+        strings = ["[(%s)*(%s)]" % (a, b) for a, b in zip(terms, terms[1:])] + ["[(%s)]" % terms[0]] * 3
+        strings.insert(2, "[(invalid)]")
+
+        for workers in (1, 2):
+            res = list(parse_many(iter(strings), workers=workers, chunksize=2))
+            self.assertEqual(len(res), len(strings))
+            for s, (node, error) in zip(strings, res):
+                if s == "[(invalid)]":
+                    self.assertIsNone(node)
+                    self.assertIsInstance(error, CannotParse)
+                    self.assertEqual(error.s, s)
+                else:
+                    self.assertIsNone(error)
+                    self.assertIs(node, IEMLParser().parse(s))
+
+        records = [r for r, _ in parse_many(strings, records=True)]
+        self.assertEqual(decode(records[0]), IEMLParser().parse(strings[0]))
+
+    def test_errors_in_chunk(self):
+        words = ["[(%s)]" % t for t in Dictionary().index if len(t) == 1][3:6]
+        hypertext = "{/%s{/%s/}/}" % (words[0], words[1])
+        strings = [words[0], hypertext, words[1], "[(invalid)]", words[2]]
+
+        for workers in (1, 2):
+            res = list(parse_many(strings, workers=workers, chunksize=len(strings)))
+            self.assertListEqual([error is None for _, error in res], [True, False, True, False, True])
+            self.assertEqual(res[1][1].s, hypertext)
+            self.assertListEqual([node for node, _ in res[::2]], [IEMLParser().parse(w) for w in words])
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.parser = IEMLParser()
+        self.parser.cache.clear()
+        self.strings = ["[(%s)]" % t for t in Dictionary().index[3:9]]
+
+    def tearDown(self):
+        self.parser.cache.max_size = PARSE_CACHE_SIZE
+        self.parser.cache.max_memory = PARSE_CACHE_MEMORY
+        self.parser.cache.clear()
+
+    def test_cache(self):
+        cache = self.parser.cache
+        res = self.parser.parse(self.strings[0])
+        self.assertIs(self.parser.parse(self.strings[0]), res)
+        self.assertDictEqual({k: cache.stats()[k] for k in ('size', 'hits', 'misses', 'evictions')},
+                             {'size': 1, 'hits': 1, 'misses': 1, 'evictions': 0})
+        # the string and the 3 nodes of the tree (word, morpheme and term)
+        self.assertEqual(cache.memory, sys.getsizeof(self.strings[0]) + 3 * NODE_MEMORY)
+
+        with self.assertRaises(CannotParse):
+            self.parser.parse("[(invalid)]")
+        self.assertEqual(len(cache), 1)
+
+        cache.invalidate(str(Dictionary().version))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.memory, 0)
+
+    def test_eviction(self):
+        cache = self.parser.cache
+        cache.max_size = 3
+        for s in self.strings:
+            self.parser.parse(s)
+        self.parser.parse(self.strings[3])
+
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.evictions, 3)
+        self.parser.parse(self.strings[-1])
+        self.assertEqual(cache.hits, 2)
+
+        cache.max_memory = cache.memory // 3
+        self.parser.parse(self.strings[0])
+        self.assertEqual(len(cache), 1)
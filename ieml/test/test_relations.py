@@ -1,7 +1,10 @@
 from unittest.case import TestCase
 
+import numpy as np
+
 from ieml.dictionary import Dictionary, term
-from ieml.dictionary.relations import RELATIONS
+from ieml.dictionary.relations import RELATIONS, relation_types, relations_mask, RelationsGraph, \
+    SYMMETRIC_RELATIONS, TABLE_RELATIONS
 from ieml.dictionary.script.tools import inverse_relation
 
 
@@ -18,6 +21,108 @@ class TestRelations(TestCase):
     def test_no_reflexive_relations(self):
         self.assertEqual(term('O:O:.O:O:.t.-').relations.opposed, ())
 
+    def test_batch_queries(self):
+        d = Dictionary()
+        terms = sorted(d.roots[term('O:M:.')])
+        indices = [t.index for t in terms]
+
+        rows, columns, masks = d.relations_graph.neighbours_of(indices, coo=True)
+        neighbours = {(terms[i], d.index[j]): relation_types(mask) for i, j, mask in zip(rows, columns, masks)}
+        self.assertDictEqual(neighbours, {(t0, t1): t0.relations.to(t1) for t0 in terms for t1 in t0.relations})
+
+        src, dst = zip(*((t0, t1) for t0 in terms for t1 in terms))
+        masks = d.relations_graph.relations_between([t.index for t in src], [t.index for t in dst],
+                                                    types=['contains', 'opposed'])
+        for t0, t1, mask in zip(src, dst, masks):
+            self.assertListEqual(relation_types(mask), t0.relations.to(t1, relations_types=['contains', 'opposed']))
+
+    def test_adjacency(self):
+        graph = Dictionary().relations_graph
+        self.assertEqual(graph.adjacency.dtype, np.uint32)
+
+        for i, reltype in enumerate(RELATIONS):
+            self.assertEqual(graph[reltype].nnz, np.count_nonzero(graph.adjacency.data >> i & 1))
+
+        t = term('O:M:.')
+        for reltype in RELATIONS:
+            self.assertListEqual(list(t.relations[reltype]), graph.relation_type(t, reltype))
+            self.assertListEqual(list(graph[reltype][t.index, :].indices), [x.index for x in t.relations[reltype]])
+
+    def test_batch_rows(self):
+        graph = Dictionary().relations_graph
+        self.assertIs(graph.adjacency, graph.adjacency)
+
+        # the rows of the batch are the rows of each term, in the order of the indices (repeated or not)
+        indices = [5, 2, 5, graph.size - 1, 0]
+        neighbours = graph.neighbours_of(indices)
+        for i, index in enumerate(indices):
+            columns, masks = graph.adjacency_row(index)
+            self.assertListEqual(list(neighbours[i].indices), list(columns))
+            self.assertListEqual(list(neighbours[i].data), list(masks))
+            self.assertListEqual(list(graph.adjacency[index].data), list(masks))
+
+        self.assertEqual(graph.neighbours_of([]).shape, (0, graph.size))
+
+    def test_storage(self):
+        graph = Dictionary().relations_graph
+        adjacency = graph.adjacency
+        self.assertLess(graph.nbytes, (adjacency.data.nbytes + adjacency.indices.nbytes + adjacency.indptr.nbytes) / 2)
+        self.assertEqual(graph.forward.indices.dtype, np.int32)
+
+        # no duplicated relations: symmetric relations in one triangle, no inverse relations
+        forward = graph.forward.tocoo()
+        self.assertFalse(np.any((forward.data & relations_mask(SYMMETRIC_RELATIONS) != 0) & (forward.row > forward.col)))
+        self.assertFalse(np.any(forward.data & relations_mask(['contained', 'child_substance', 'child_attribute',
+                                                               'child_mode'] + TABLE_RELATIONS)))
+
+        # loaded from the matrices of each relation type
+        other = RelationsGraph.from_relations(graph.dictionary, {r: graph[r] for r in RELATIONS})
+        self.assertEqual((other.adjacency != adjacency).nnz, 0)
+
+    def test_lazy(self):
+        graph = Dictionary().relations_graph
+        lazy = RelationsGraph(Dictionary(), lazy=True)
+        self.assertFalse(lazy.complete)
+
+        t = term('O:M:.')
+        self.assertListEqual(lazy.relation_type(t, 'father_substance'), graph.relation_type(t, 'father_substance'))
+        self.assertListEqual(lazy.relation_type(t, 'table_0'), graph.relation_type(t, 'table_0'))
+        self.assertEqual(lazy.computed_blocks.sum(), 1)
+        self.assertEqual(lazy.computed_fathers.sum(), 1)
+
+        for reltype in RELATIONS:
+            self.assertEqual((lazy[reltype] != graph[reltype]).nnz, 0)
+        self.assertTrue(lazy.complete)
+
+    def test_traverse(self):
+        graph = Dictionary().relations_graph
+        types = ['father_substance', 'child_substance', 'opposed', 'associated', 'crossed', 'twin']
+        t = term('O:M:.')
+
+        depth = {t: 0}
+        frontier = [t]
+        for i in range(1, 3):
+            frontier = [t1 for t0 in frontier for r in types for t1 in t0.relations[r]]
+            for t1 in frontier:
+                depth.setdefault(t1, i)
+            frontier = [t1 for t1 in set(frontier) if depth[t1] == i]
+
+        indices, depths = graph.traverse([t.index], types=types, max_depth=2)
+        self.assertDictEqual({graph.dictionary.index[i]: d for i, d in zip(indices, depths)}, depth)
+        self.assertListEqual(list(depths), sorted(depths))
+
+        indices, depths = graph.traverse([t.index], exclude=['contains', 'contained'], max_depth=3, max_per_depth=2)
+        self.assertLessEqual(max(np.bincount(depths)), 2)
+
+    def test_ancestors(self):
+        graph = Dictionary().relations_graph
+        self.assertEqual((graph.ancestors('s') != graph['father_substance']).nnz, 0)
+        self.assertEqual((graph.descendants('am') != graph.ancestors('am').transpose()).nnz, 0)
+
+        for t in Dictionary():
+            expected = {t2.index for t1 in t.relations.father['s'] for t2 in t1.relations.father['a']}
+            self.assertSetEqual(set(graph.ancestors('sa')[t.index, :].indices), expected)
+
     def test_index(self):
         r0 = [t for t in Dictionary()]
         self.assertListEqual(r0, sorted(r0))
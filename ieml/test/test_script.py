@@ -1,9 +1,11 @@
 import unittest
+import numpy as np
 
-from ieml.exceptions import TooManySingularSequences
+from ieml.exceptions import TooManySingularSequences, InvalidScript
 from ieml.dictionary.script import script as sc
 from ieml.constants import AUXILIARY_CLASS, VERB_CLASS, NOUN_CLASS, PRIMITIVES
-from ieml.dictionary.script import MultiplicativeScript, AdditiveScript
+from ieml.dictionary.script import MultiplicativeScript, AdditiveScript, union, intersection, difference, is_disjoint, \
+    disjoint_matrix
 
 scripts = list(map(sc, ["O:.E:M:.-"]))
 
@@ -37,4 +39,40 @@ class TestScript(unittest.TestCase):
 
     def test_str(self):
         self.assertIsNotNone(MultiplicativeScript(character='A')._str)
-        self.assertIsNotNone(AdditiveScript(character='O')._str)
\ No newline at end of file
+        self.assertIsNotNone(AdditiveScript(character='O')._str)
+
+    def test_cells_index(self):
+        s = sc('O:M:.')
+        cells = s.cells[0]
+        self.assertEqual(cells.dtype, np.int32)
+        self.assertTupleEqual(cells.shape, (2, 3, 1))
+        self.assertListEqual(sorted(cells.ravel().tolist()), list(range(s.cardinal)))
+        self.assertEqual(s.singular_sequences[cells[1, 0, 0]], sc('A:S:.'))
+
+    def test_set_algebra(self):
+        self.assertEqual(union(sc('O:M:.'), sc('M:M:.')), sc('F:M:.'))
+        self.assertEqual(union(sc('U:S:.'), sc('U:B:.'), sc('U:T:.')), sc('U:M:.'))
+        self.assertEqual(intersection(sc('O:M:.'), sc('U:I:.')), sc('U:M:.'))
+        self.assertIsNone(intersection(sc('O:M:.'), sc('M:M:.')))
+        self.assertSetEqual(set(difference(sc('O:M:.'), sc('U:S:.')).singular_sequences),
+                            set(sc('O:M:.').singular_sequences) - {sc('U:S:.')})
+        self.assertIsNone(difference(sc('U:M:.'), sc('O:M:.')))
+
+        self.assertTrue(is_disjoint(sc('O:M:.'), sc('M:M:.')))
+        self.assertFalse(is_disjoint(sc('O:M:.'), sc('U:S:.')))
+
+        with self.assertRaises(InvalidScript):
+            union(sc('O:M:.'), sc('O:'))
+
+        res = disjoint_matrix([sc('O:M:.'), sc('M:M:.'), sc('U:S:.')])
+        self.assertListEqual(res.tolist(), [[False, True, False], [True, False, True], [False, True, False]])
+
+    def test_set_algebra_sequences(self):
+        s0, s1 = MultiplicativeScript(substance=sc('M:M:.'), attribute=sc('O:O:.')), sc('wo.M:M:.-')
+        self.assertTrue(is_disjoint(s0, s1))
+        self.assertEqual(intersection(s0, sc('M:M:.wa.-')), sc('M:M:.wa.-'))
+        self.assertEqual(union(sc('s.y.-'), sc('s.o.-'), sc('s.e.-')), sc('s.U:M:.-'))
+        self.assertEqual(difference(sc('s.U:M:.-'), sc('s.o.-'), sc('s.e.-')), sc('s.y.-'))
+        # the singular sequences of the operands are not built
+        self.assertIsNone(s0._singular_sequences)
+        self.assertIsNone(s1._singular_sequences)
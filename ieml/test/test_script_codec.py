@@ -0,0 +1,45 @@
+import unittest
+
+from ieml.dictionary.script import AdditiveScript, MultiplicativeScript, NullScript
+from ieml.dictionary.script.codec import encode, decode
+from ieml.dictionary.script.parser import ScriptParser
+from ieml.exceptions import InvalidScript
+
+
+class TestScriptCodec(unittest.TestCase):
+    def setUp(self):
+        self.parser = ScriptParser()
+
+    def test_round_trip(self):
+        for s in ["E:", "U:", "O:", "U:+S:", "E:+S:+B:", "wa.", "O:M:.", "E:U:.", "O:.-M:.-s.y.-'",
+                  "s.-S:.U:.-'l.-S:.O:.-'n.-T:.A:.-',+M:.-'M:.-'n.-T:.A:.-',",
+                  "t.i.-s.i.-'u.T:.-U:.-'O:O:.-',B:.-',_M:.-',_;",
+                  "S:M:.e.-M:M:.u.-E:.-+wa.e.-'+B:M:.e.-M:M:.a.-E:.-+wa.e.-'+T:M:.e.-M:M:.i.-E:.-+wa.e.-'"]:
+            script = self.parser.parse(s)
+            res = decode(encode(script))
+
+            self.assertEqual(str(res), str(script))
+            self.assertEqual(res.__class__, script.__class__)
+            self.assertEqual(res.canonical, script.canonical)
+            for ss in script.singular_sequences:
+                self.assertEqual(str(decode(encode(ss))), str(ss))
+
+    def test_node_classes(self):
+        self.assertIsInstance(decode(encode(self.parser.parse("E:"))), NullScript)
+        self.assertIsInstance(decode(encode(self.parser.parse("wa."))), MultiplicativeScript)
+        self.assertIsInstance(decode(encode(self.parser.parse("F:"))), AdditiveScript)
+
+    def test_buffers(self):
+        script = self.parser.parse("O:.-M:.-s.y.-'")
+        data = encode(script)
+        for buffer in (bytearray(data), memoryview(data), memoryview(b'\x00' + data)[1:]):
+            self.assertEqual(str(decode(buffer)), str(script))
+
+    def test_invalid(self):
+        data = encode(self.parser.parse("O:M:."))
+        with self.assertRaises(InvalidScript):
+            decode(data[:-1])
+        with self.assertRaises(InvalidScript):
+            decode(data + b'\x00')
+        with self.assertRaises(InvalidScript):
+            decode(bytes([7 << 3]))
@@ -0,0 +1,71 @@
+import mmap
+import os
+import tempfile
+import unittest
+
+from ieml.dictionary import Dictionary
+from ieml.exceptions import InvalidIEMLObjectArgument
+from ieml.syntax import SyntaxTerm, Morpheme, Word, Clause, Sentence, SuperClause, SuperSentence, Text, \
+    Hyperlink, PropositionPath
+from ieml.syntax.codec import encode, decode, decode_from, dump, load, version_id, version_from_id
+from ieml.syntax.commons import _INTERNED
+from ieml.usl import usl
+
+
+class TestSyntaxCodec(unittest.TestCase):
+    def setUp(self):
+        a, b, c, d, e, f = [SyntaxTerm(t) for t in Dictionary().index if len(t) == 1][3:9]
+        self.words = [Word(Morpheme([a, b]), Morpheme([c])), Word(Morpheme([c])), Word(Morpheme([d]), literals='l'),
+                      Word(Morpheme([SyntaxTerm(e.term, literals=['x', 'é'])])), Word(Morpheme([f]))]
+        w0, w1, w2, w3, w4 = self.words
+        self.sentences = [Sentence([Clause(w0, w1, w2), Clause(w0, w2, w1)], literals='s'),
+                          Sentence([Clause(w1, w3, w4)]), Sentence([Clause(w2, w4, w0)])]
+        s0, s1, s2 = self.sentences
+        self.super_sentence = SuperSentence([SuperClause(s0, s1, s2)])
+        self.text = Text([self.super_sentence, w3, s2])
+
+    def test_round_trip(self):
+        nodes = self.words + self.sentences + [self.super_sentence, self.text, self.words[0].root]
+        for node in nodes:
+            self.assertIs(decode(encode(node)), node)
+
+        _INTERNED.clear()
+        for node in nodes:
+            res = decode(encode(node))
+            self.assertIsNot(res, node)
+            self.assertEqual(str(res), str(node))
+            self.assertEqual(res.__class__, node.__class__)
+            self.assertEqual(res.fingerprint(), node.fingerprint())
+
+    def test_hyperlink(self):
+        w0, w1 = self.words[:2]
+        hyperlink = Hyperlink(Text([w0, self.sentences[1]]), Text([w1]), PropositionPath([w0]))
+        res = decode(encode(hyperlink))
+        self.assertEqual(str(res), str(hyperlink))
+        self.assertIs(res.path.end, w0)
+
+    def test_records(self):
+        nodes = self.words + self.sentences + [self.text]
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'records.bin')
+            with open(file, 'wb') as fp:
+                offsets = dump(nodes, fp)
+
+            with open(file, 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                self.assertListEqual(list(load(buffer)), nodes)
+                self.assertIs(decode(buffer, offsets[5]), nodes[5])
+                self.assertEqual(decode_from(buffer, offsets[-1])[1], len(buffer))
+
+    def test_usl(self):
+        u = usl(self.text)
+        self.assertEqual(usl(bytes(u)), u)
+
+    def test_version_id(self):
+        version = self.text.dictionary_version
+        self.assertEqual(version_from_id(version_id(version)), version)
+
+    def test_invalid(self):
+        data = encode(self.text)
+        for invalid in (data[:-1], b'\x00\x00\x00\x05' + data[4:], data[:8] + b'\x7f' + data[9:]):
+            with self.assertRaises(InvalidIEMLObjectArgument):
+                decode(invalid)
@@ -1,5 +1,6 @@
 import random
 from unittest.case import TestCase
+from ieml.exceptions import InvalidTreeStructure
 from ieml.syntax.tree_graph import TreeGraph
 
 
@@ -13,3 +14,29 @@ class TestTreeGraph(TestCase):
     def test_transition_order(self):
         tree = self._tree_from_range(10)
         self.assertTupleEqual(list(zip(*tree.transitions[0]))[0], tuple(range(1, 10)))
+
+    def test_parents_and_paths(self):
+        tree = TreeGraph([(0, 1, 'a'), (0, 2, 'b'), (2, 3, 'c'), (2, 4, 'd'), (2, 4, 'e')])
+
+        self.assertEqual(tree.root, 0)
+        self.assertListEqual(tree.parents, [-1, 0, 0, 2, 2])
+        self.assertEqual(tree.parent(4), 2)
+        self.assertIsNone(tree.parent(0))
+        self.assertTupleEqual(tree.path(4), ([0, 2, 4], (1, 1)))
+        self.assertListEqual(tree.stages, [[0], [1, 2], [3, 4, 4]])
+
+    def test_invalid(self):
+        for transitions in ([(0, 1, ''), (2, 3, '')],
+                            [(0, 1, ''), (1, 0, '')],
+                            [(0, 1, ''), (0, 2, ''), (2, 1, '')],
+                            [(0, 1, ''), (2, 3, ''), (3, 2, '')]):
+            with self.assertRaises(InvalidTreeStructure):
+                TreeGraph(transitions)
+
+    def test_not_validated(self):
+        transitions = [(0, 1, 'a'), (0, 2, 'b'), (2, 3, 'c')]
+        tree, _tree = TreeGraph(transitions), TreeGraph(transitions, validate=False)
+        self.assertEqual(_tree.root, tree.root)
+        self.assertListEqual(_tree.parents, tree.parents)
+        self.assertListEqual(_tree.paths, tree.paths)
+        self.assertListEqual(_tree.stages, tree.stages)
@@ -2,12 +2,14 @@ import xml.etree.ElementTree as ET
 import random
 import itertools
 import functools
+from multiprocessing import Pool
 
 from urllib.request import urlopen
 
 from ieml.exceptions import CannotParse
 
 from ieml.syntax.parser.parser import IEMLParser
+from ieml.syntax.codec import encode, decode
 from ieml.syntax.commons import IEMLSyntax
 from ieml.syntax.terms import SyntaxTerm
 from ieml.dictionary.version import get_default_dictionary_version
@@ -152,10 +154,7 @@ def ieml(arg, dictionary_version=None):
         dictionary_version = get_default_dictionary_version()
 
     if isinstance(arg, IEMLSyntax):
-        if arg.dictionary_version != dictionary_version:
-            arg.set_dictionary_version(dictionary_version)
-
-        return arg
+        return arg._translated(dictionary_version)
 
     if isinstance(arg, str):
         try:
@@ -164,10 +163,69 @@ def ieml(arg, dictionary_version=None):
             raise InvalidIEMLObjectArgument(IEMLSyntax, str(e))
 
     if isinstance(arg, Term):
-        arg = SyntaxTerm(arg)
-        if arg.dictionary_version != dictionary_version:
-            arg.set_dictionary_version(dictionary_version)
+        return SyntaxTerm(arg)._translated(dictionary_version)
+
+    raise NotImplemented
+
+
+# the parser of the worker process, see parse_many
+_worker_parser = None
+
+
+def _init_worker(dictionary_version):
+    global _worker_parser
+    _worker_parser = IEMLParser(Dictionary(dictionary_version))
 
-        return arg
 
-    raise NotImplemented
\ No newline at end of file
+def _parse_chunk(strings):
+    """Parse the strings with the parser of the process, return the list of records or (string, error message)"""
+    result = []
+    for s in strings:
+        try:
+            result.append(encode(_worker_parser.parse(s)))
+        except CannotParse as e:
+            result.append((s, e.msg))
+        except Exception as e:
+            # any other error of this string (a hypertext is not supported by the parser for instance), the next
+            # strings of the chunk are still parsed
+            result.append((s, str(e)))
+
+    return result
+
+
+def _chunks(iterable, chunksize):
+    iterable = iter(iterable)
+    chunk = list(itertools.islice(iterable, chunksize))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterable, chunksize))
+
+
+def parse_many(strings, dictionary_version=None, workers=1, chunksize=1000, records=False):
+    """
+    Parse a corpus of IEML strings. The strings are parsed by chunks in the worker processes, each one loads the
+    dictionary once, and the syntax trees are sent back as binary records (see ieml.syntax.codec).
+    :param strings: an iterable of str
+    :param workers: the number of processes, 1 to parse in the current process
+    :param chunksize: the number of strings sent to a worker at once
+    :param records: yield the binary records instead of the syntax trees
+    :return: an iterator, in the order of the strings, of (syntax tree or record, None) if the string is parsed and
+    (None, CannotParse exception) if not (whatever the error of the string)
+    """
+    if not dictionary_version:
+        dictionary_version = get_default_dictionary_version()
+
+    def _results(results):
+        for result in results:
+            for r in result:
+                if isinstance(r, tuple):
+                    yield None, CannotParse(*r)
+                else:
+                    yield (r if records else decode(r)), None
+
+    if workers > 1:
+        with Pool(workers, initializer=_init_worker, initargs=(str(dictionary_version),)) as pool:
+            yield from _results(pool.imap(_parse_chunk, _chunks(strings, chunksize)))
+    else:
+        _init_worker(dictionary_version)
+        yield from _results(map(_parse_chunk, _chunks(strings, chunksize)))
@@ -1,7 +1,5 @@
 from collections import defaultdict
 
-import numpy
-
 from ieml.exceptions import InvalidPathException
 from ieml.syntax.terms import SyntaxTerm
 from ieml.tools import ieml
@@ -142,9 +140,10 @@ def _enumerate_paths(ieml_obj, level):
                 yield [path('t%d'%i)] + p, e
 
     if isinstance(ieml_obj, (Sentence, SuperSentence)):
+        modes = _tree_graph_modes(ieml_obj.tree_graph)
         for node in set(node for clause in ieml_obj for node in clause):
             for p, e in _enumerate_paths(node, level=level):
-                yield [_tree_graph_path_of_node(ieml_obj.tree_graph, node)] + p, e
+                yield [_tree_graph_path_of_node(ieml_obj.tree_graph, node, modes=modes)] + p, e
 
     if isinstance(ieml_obj, Word):
         for i, t in enumerate(ieml_obj.root.children):
@@ -159,25 +158,34 @@ def _enumerate_paths(ieml_obj, level):
     return
 
 
-def _tree_graph_path_of_node(tree_graph, node):
-    if node in tree_graph.nodes:
+def _tree_graph_modes(tree_graph):
+    """The mapping mode -> list of the end nodes of the transitions that have this mode"""
+    modes = defaultdict(list)
+    for c_list in tree_graph.transitions.values():
+        for c in c_list:
+            modes[c[1][2]].append(c[0])
+
+    return modes
+
+
+def _tree_graph_path_of_node(tree_graph, node, modes=None):
+    if node in tree_graph.nodes_index:
         nodes = [(node, False)]
     else:
         nodes = []
 
     # can be a mode
-    nodes += [(c[0], True) for c_list in tree_graph.transitions.values() for c in c_list if c[1][2] == node]
+    if modes is None:
+        modes = _tree_graph_modes(tree_graph)
+    nodes += [(end, True) for end in modes.get(node, ())]
     if not nodes:
         raise ValueError("Node not in tree graph : %s" % str(node))
 
     def _build_coord(node, mode=False):
-        if node == tree_graph.root:
-            return [Coordinate(kind='s')]
-
-        parent = tree_graph.nodes[numpy.where(tree_graph.array[:, tree_graph.nodes_index[node]])[0][0]]
-
-        return _build_coord(parent) + \
-               [Coordinate(index=[c[0] for c in tree_graph.transitions[parent]].index(node), kind='m' if mode else 'a')]
+        positions = tree_graph.paths[tree_graph.nodes_index[node]]
+        return [Coordinate(kind='s')] + \
+               [Coordinate(index=i, kind='a') for i in positions[:-1]] + \
+               [Coordinate(index=i, kind='m' if mode else 'a') for i in positions[-1:]]
 
     return AdditivePath([MultiplicativePath(_build_coord(node, mode)) for node, mode in nodes])
 
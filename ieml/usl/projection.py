@@ -36,7 +36,8 @@ def project_usls_on_dictionary(usls, allowed_terms=None):
             for c in t.singular_sequences:
                 # This is the first time we meet the cell c
                 if not cells_to_usls[c]:
-                    tables.update(c.relations.contained)
+                    tables.add(c)
+                    tables.update(c.dictionary.index[i] for i in c.dictionary.tables_index.tables_of(c.index))
 
                 cells_to_usls[c].add(u)
 
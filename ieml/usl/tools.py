@@ -1,5 +1,6 @@
 import random
 
+from ieml.syntax.codec import decode
 from ieml.syntax.commons import IEMLSyntax, IEMLSyntaxType
 from ..syntax import Sentence, SuperSentence, Text, Word, Morpheme
 from ieml.tools import ieml
@@ -21,6 +22,9 @@ def usl(arg):
     if isinstance(arg, str):
         return USLParser().parse(arg)
 
+    if isinstance(arg, (bytes, bytearray, memoryview)):
+        return Usl(decode(arg))
+
     if isinstance(arg, dict):
         # map path -> Ieml_object
         return Usl(resolve_ieml_object(arg))
@@ -1,6 +1,7 @@
 from itertools import islice
 
 from ieml.commons import cached_property
+from ieml.syntax.codec import encode
 from ieml.syntax.commons import IEMLSyntax
 
 from ieml.syntax.terms import SyntaxTerm
@@ -26,6 +27,14 @@ class Usl:
     def __hash__(self):
         return hash(self.ieml_object)
 
+    def __bytes__(self):
+        """The binary record of the ieml object, see ieml.syntax.codec"""
+        return encode(self.ieml_object)
+
+    def fingerprint(self, bits=64, dictionary_version=None):
+        """The Merkle fingerprint of the ieml object, stable across processes (see IEMLSyntax.fingerprint)."""
+        return self.ieml_object.fingerprint(bits=bits, dictionary_version=dictionary_version)
+
     @property
     def paths(self):
         return self.rules(SyntaxTerm)
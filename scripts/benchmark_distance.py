@@ -0,0 +1,29 @@
+"""
+Benchmark of the construction of the distance matrices (relation and order) of a dictionary version.
+
+usage: python -m scripts.benchmark_distance [version] [repeat]
+"""
+import sys
+import timeit
+
+from ieml.dictionary import Dictionary
+from ieml.dictionary.distance import _build_distance_matrix
+from ieml.dictionary.version import get_default_dictionary_version, DictionaryVersion
+
+
+def benchmark(version, repeat=5):
+    # the dictionary and the relations are not part of the benchmark
+    d = Dictionary(version)
+    d.relations_graph.adjacency
+
+    times = timeit.repeat(lambda: _build_distance_matrix(version), number=1, repeat=repeat)
+    mat = _build_distance_matrix(version)
+
+    print("Dictionary %s: %d terms" % (str(version), len(d)))
+    print("relation: %d entries, order: %d entries" % (mat['relation'].nnz, mat['order'].nnz))
+    print("build distance matrices: best %.3fs, mean %.3fs (%d runs)" % (min(times), sum(times) / len(times), repeat))
+
+
+if __name__ == '__main__':
+    version = DictionaryVersion(sys.argv[1]) if len(sys.argv) > 1 else get_default_dictionary_version()
+    benchmark(version, repeat=int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,37 @@
+"""
+Benchmark of the parsing of IEML strings (random words, sentences and texts), without the parse cache.
+
+usage: python -m scripts.benchmark_parser [nb_sentences] [repeat]
+"""
+import random
+import sys
+import timeit
+
+from ieml.syntax import IEMLParser, Text
+from ieml.syntax.commons import _INTERNED
+from scripts.benchmark_syntax import random_sentences
+
+
+def benchmark(count=2000, repeat=5):
+    sentences = random_sentences(count)
+    rand = random.Random(0)
+    words = list({w for s in sentences for c in s for w in c})
+    texts = [Text(rand.sample(sentences, 3) + rand.sample(words, 3)) for _ in range(count // 10)]
+
+    parser = IEMLParser()
+    parser.cache.max_size = 0
+
+    for name, nodes in (('words', words), ('sentences', sentences), ('texts', texts)):
+        strings = [str(n) for n in nodes]
+        assert all(parser.parse(s) == n for s, n in zip(strings, nodes))
+
+        times = timeit.repeat(lambda: [parser.parse(s) for s in strings], setup=_INTERNED.clear, number=1,
+                              repeat=repeat)
+        print("%s: %d strings, %d characters, best %.3fs (%.0f strings/s, %.0f characters/s)" %
+              (name, len(strings), sum(map(len, strings)), min(times), len(strings) / min(times),
+               sum(map(len, strings)) / min(times)))
+
+
+if __name__ == '__main__':
+    benchmark(count=int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+              repeat=int(sys.argv[2]) if len(sys.argv) > 2 else 5)
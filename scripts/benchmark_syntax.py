@@ -0,0 +1,103 @@
+"""
+Benchmark of the bulk loading of syntax trees, with the validating constructors and with the trusted construction
+(IEMLSyntax._from_validated) used for the trees already validated, and of their storage as IEML strings and as binary
+records (ieml.syntax.codec).
+
+usage: python -m scripts.benchmark_syntax [nb_sentences] [repeat]
+"""
+import random
+import sys
+import timeit
+
+from ieml.dictionary import Dictionary
+from ieml.exceptions import InvalidIEMLObjectArgument
+from ieml.syntax import SyntaxTerm, Morpheme, Word, Clause, Sentence, SuperClause, SuperSentence, Text, IEMLParser
+from ieml.syntax import codec
+from ieml.syntax.commons import _INTERNED
+
+
+def random_sentences(count, seed=0):
+    rand = random.Random(seed)
+    terms = [SyntaxTerm(t) for t in Dictionary().index]
+
+    words = []
+    while len(words) < 500:
+        try:
+            words.append(Word(Morpheme(rand.sample(terms, rand.randint(1, 3))),
+                              Morpheme(rand.sample(terms, rand.randint(1, 2)))))
+        except InvalidIEMLObjectArgument:
+            pass
+
+    sentences = []
+    while len(sentences) < count:
+        nodes = rand.sample(words, 6)
+        clauses = [Clause(nodes[rand.randrange(i)], nodes[i], rand.choice(words)) for i in range(1, len(nodes))]
+        try:
+            sentences.append(Sentence(clauses))
+        except InvalidIEMLObjectArgument:
+            pass
+
+    return sentences
+
+
+def _construct(cls, children, literals):
+    if cls in (Morpheme, Text):
+        return cls(children)
+    if cls in (Clause, SuperClause):
+        return cls(children=children)
+    if cls in (Sentence, SuperSentence):
+        return cls(children, literals=literals)
+
+    return cls(children=children, literals=literals)
+
+
+def rebuild(node, trusted):
+    """Rebuild the node bottom-up from its terms, as a deserializer would"""
+    if isinstance(node, SyntaxTerm):
+        if trusted:
+            return SyntaxTerm._from_validated(node.term, node.literals)
+        return SyntaxTerm(node.term, literals=node.literals)
+
+    children = [rebuild(c, trusted) for c in node.children]
+    if trusted:
+        return node.__class__._from_validated(children, node.literals)
+
+    return _construct(node.__class__, children, node.literals)
+
+
+def benchmark(count=2000, repeat=5):
+    sentences = random_sentences(count)
+
+    def load(trusted):
+        # the interned nodes would be reused, start from an empty table
+        _INTERNED.clear()
+        return [rebuild(s, trusted) for s in sentences]
+
+    for trusted in (False, True):
+        assert [str(s) for s in load(trusted)] == [str(s) for s in sentences]
+        times = timeit.repeat(lambda: load(trusted), number=1, repeat=repeat)
+        print("%s construction: %d sentences, best %.3fs (%.0f sentences/s)" %
+              ('trusted' if trusted else 'validating', count, min(times), count / min(times)))
+
+    parser = IEMLParser()
+    # time the parsing, not the parse cache
+    parser.cache.max_size = 0
+    parser.cache.clear()
+    strings = [str(s) for s in sentences]
+    records = b''.join(codec.encode(s) for s in sentences)
+    print("storage: %d bytes as strings, %d bytes as records" % (sum(len(s.encode()) for s in strings), len(records)))
+
+    def _time(func):
+        return min(timeit.repeat(func, setup=_INTERNED.clear, number=1, repeat=repeat))
+
+    for name, store, _load in (('string', lambda: [str(s) for s in sentences],
+                                lambda: [parser.parse(s) for s in strings]),
+                               ('binary', lambda: [codec.encode(s) for s in sentences],
+                                lambda: list(codec.load(records)))):
+        print("%s: store %.0f sentences/s, load %.0f sentences/s" %
+              (name, count / _time(store), count / _time(_load)))
+
+
+if __name__ == '__main__':
+    benchmark(count=int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+              repeat=int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -5,10 +5,11 @@ import string
 
 from collections import defaultdict
 
+import numpy as np
 import progressbar
 from bidict._bidict import bidict
 
-from ieml.dictionary.terms.relations import INVERSE_RELATIONS
+from ieml.dictionary.relations import INVERSE_RELATIONS, relation_types
 
 from ieml.commons import GRAMMATICAL_CLASS_NAMES
 
@@ -102,10 +103,16 @@ def drupal_relations_dump(number=None, all=False):
 
     REL = list(_RELATIONS)
 
-    for i, t0 in enumerate(paradigm):
-        for t1 in paradigm[i:]:
-            for r in t0.relations.to(t1, relations_types=REL):
-                add_rel(t0, t1, r)
+    dictionary = Dictionary()
+    position = np.full(len(dictionary), -1, dtype=np.int64)
+    position[[t.index for t in paradigm]] = np.arange(len(paradigm))
+
+    rows, columns, masks = dictionary.relations_graph.neighbours_of([t.index for t in paradigm], types=REL, coo=True)
+    for i, j, mask in zip(rows, columns, masks):
+        # relations from a term to itself or to the following terms of the paradigm
+        if position[j] >= i:
+            for r in relation_types(mask):
+                add_rel(paradigm[i], paradigm[position[j]], r)
 
     res = []
 